@@ -29,20 +29,36 @@ import sys
 import json
 import subprocess
 import argparse
-import random
-import time
 import re
+import shutil
+import time
+import queue
+import threading
+import multiprocessing
 import asyncio
+import functools
+import hashlib
 import base64
 import urllib.parse
+from itertools import chain
+from dataclasses import dataclass
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait,
+)
 from pathlib import Path
-from difflib import SequenceMatcher
+from typing import Callable
 from dotenv import load_dotenv
 
+import numba
 import numpy as np
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import soundfile as sf
+import soxr
 import librosa
+from rapidfuzz import fuzz, process
 
 # Load .env
 load_dotenv(Path(__file__).parent.parent / ".env")
@@ -67,6 +83,24 @@ MIN_PHRASE_DURATION = 0.6   # seconds — minimum clip length
 MAX_PHRASE_DURATION = 4.0   # seconds — maximum clip length
 MAX_CLIPS_PER_SONG = 50    # limit per song
 
+# JSON caches (transcripts/) go through orjson; OPT_SERIALIZE_NUMPY covers the
+# numpy scalars that librosa/numba timestamps come back as.
+_ORJSON_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _read_json(path: Path):
+    return orjson.loads(path.read_bytes())
+
+
+def _write_json(path: Path, obj) -> None:
+    path.write_bytes(orjson.dumps(obj, option=_ORJSON_OPTS))
+
+
+def _write_lines(path: Path, lines) -> None:
+    """Write pre-formatted lines as one UTF-8 blob (open + one write + close,
+    no per-line TextIOWrapper encode)."""
+    path.write_bytes("".join(lines).encode("utf-8"))
+
 
 # ──────────────────────────────────────────────────────────────────────────────
 # RAP SONG DATABASE
@@ -133,6 +167,7 @@ RAP_SONGS = [
 # STEP 1: Download (reuse from crawl_rap.py)
 # ──────────────────────────────────────────────────────────────────────────────
 
+@functools.lru_cache(maxsize=4096)
 def safe_name(index: int, artist: str, title: str) -> str:
     s = f"{index:03d}_{artist.replace(' ', '_')}_{title.replace(' ', '_')}"
     return "".join(c for c in s if c.isalnum() or c in "_-")
@@ -173,12 +208,70 @@ def download_song(artist: str, title: str, url: str, index: int) -> Path | None:
     return None
 
 
+def download_all_songs(
+    artists_filter: list[str] | None, workers: int,
+) -> list[tuple[Path, str, str, int]]:
+    """
+    Download all (filtered) songs in parallel. Each worker just blocks on a
+    yt-dlp subprocess, so threads overlap the network time without any GIL
+    contention. Returns [(path, artist, title, index), ...] in RAP_SONGS order.
+    """
+    jobs = [
+        (artist, title, url, i)
+        for i, (artist, title, url) in enumerate(RAP_SONGS)
+        if not artists_filter or any(a in artist.lower() for a in artists_filter)
+    ]
+    songs = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(download_song, *job): job for job in jobs}
+        for future in as_completed(futures):
+            artist, title, _, i = futures[future]
+            path = future.result()
+            if path and path.exists():
+                songs.append((path, artist, title, i))
+    songs.sort(key=lambda s: s[3])
+    return songs
+
+
+def load_song(wav_path: Path) -> np.ndarray:
+    """Decode a song to mono float32 at SAMPLE_RATE."""
+    y, _ = librosa.load(str(wav_path), sr=SAMPLE_RATE, mono=True)
+    return y
+
+
+def lazy_song(wav_path: Path) -> Callable[[], np.ndarray]:
+    """
+    Zero-arg loader for wav_path: decodes on the first call and returns the
+    same buffer afterwards, so steps that share a song decode it at most
+    once — and not at all when every step hits its cache.
+    """
+    return functools.cache(functools.partial(load_song, wav_path))
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # STEP 2: Fetch real lyrics from lyrics-api (Musixmatch / YouTube Music)
 # ──────────────────────────────────────────────────────────────────────────────
 
 LYRICS_API_BASE = "https://lyrics.lewdhutao.my.eu.org"
 
+# Shared session for every HTTPS call (lyrics API + Grok chat): keeps TLS
+# connections alive across endpoints/songs/threads, and urllib3 handles
+# 429/5xx backoff (honouring Retry-After) for the idempotent GETs.
+# One pool per host; each sized for the I/O worker threads.
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=16,
+    max_retries=Retry(
+        total=3, backoff_factor=1.0,
+        status_forcelist=[429, 502, 503, 504],
+        respect_retry_after_header=True, raise_on_status=False,
+    ),
+))
+
+# Search-term cleanup (special chars that confuse the API; A$AP → ASAP)
+_TITLE_STRIP_RE = re.compile(r'[.\-\'\"!?]')
+_ARTIST_DOLLAR_RE = re.compile(r'[$]')
+
 
 def fetch_lyrics(artist: str, title: str, song_name: str) -> dict | None:
     """
@@ -190,12 +283,11 @@ def fetch_lyrics(artist: str, title: str, song_name: str) -> dict | None:
     cache_path = TRANSCRIPTS_DIR / f"{song_name}.json"
     if cache_path.exists():
         print(f"  [cache] {cache_path.name}")
-        with open(cache_path) as f:
-            return json.load(f)
+        return _read_json(cache_path)
 
     # Clean title for search (remove special chars that confuse the API)
-    clean_title = re.sub(r'[.\-\'\"!?]', '', title).strip()
-    clean_artist = re.sub(r'[$]', 'S', artist)  # A$AP → ASAP
+    clean_title = _TITLE_STRIP_RE.sub('', title).strip()
+    clean_artist = _ARTIST_DOLLAR_RE.sub('S', artist)  # A$AP → ASAP
 
     lyrics_text = None
     source = None
@@ -209,17 +301,16 @@ def fetch_lyrics(artist: str, title: str, song_name: str) -> dict | None:
             params = {"title": clean_title, "artist": clean_artist}
             url = f"{LYRICS_API_BASE}{endpoint}?{urllib.parse.urlencode(params)}"
             print(f"    Trying {src_name}: {clean_artist} — {clean_title}")
-            resp = requests.get(url, timeout=15)
+            resp = _HTTP_SESSION.get(url, timeout=15)
             if resp.status_code == 200:
-                data = resp.json()
+                data = orjson.loads(resp.content)
                 text = data.get("data", {}).get("lyrics", "")
                 if text and len(text) > 50:  # sanity check
                     lyrics_text = text
                     source = src_name
                     break
             elif resp.status_code == 429:
-                print(f"    [RATE LIMITED] Waiting 5s...")
-                time.sleep(5)
+                print(f"    [RATE LIMITED] {src_name} still rate-limited after retries")
                 continue
         except Exception as e:
             print(f"    [{src_name} error] {e}")
@@ -242,8 +333,7 @@ def fetch_lyrics(artist: str, title: str, song_name: str) -> dict | None:
     }
 
     # Cache
-    with open(cache_path, "w") as f:
-        json.dump(result, f, indent=2)
+    _write_json(cache_path, result)
 
     print(f"  → {len(lines)} lines from {source}")
     return result
@@ -259,6 +349,17 @@ GROK_WS_URL = "wss://api.x.ai/v1/realtime"
 GROK_SR = 24000  # Grok Realtime expects 24 kHz PCM16
 SEG_DURATION = 10.0  # seconds per transcription window
 SEG_STEP = 5.0       # step between windows
+GROK_CONCURRENCY = 8  # max simultaneous Voice API sessions per song
+MAX_APPEND_BYTES = 1_000_000  # PCM bytes sent in a single append event
+APPEND_CHUNK = 48000  # chunk size above that (multiple of 3 → clean base64 slices)
+
+
+def _to_pcm16(audio: np.ndarray) -> np.ndarray:
+    """Float audio → int16 PCM using one float32 scratch buffer (input untouched,
+    since retries resend the same array)."""
+    buf = np.clip(audio, -1.0, 1.0, out=np.empty(audio.shape, dtype=np.float32))
+    np.multiply(buf, 32767, out=buf)
+    return buf.astype(np.int16)
 
 
 async def _grok_transcribe_segment(audio_24k, seg_id: str) -> str:
@@ -269,8 +370,8 @@ async def _grok_transcribe_segment(audio_24k, seg_id: str) -> str:
     """
     import websockets
 
-    pcm_int16 = (np.clip(audio_24k, -1.0, 1.0) * 32767).astype(np.int16)
-    pcm_bytes = pcm_int16.tobytes()
+    # Byte view over the int16 buffer — base64 reads it directly, no .tobytes() copy
+    pcm_bytes = memoryview(_to_pcm16(audio_24k)).cast("B")
     headers = {"Authorization": f"Bearer {XAI_API_KEY}"}
     transcript = ""
 
@@ -300,11 +401,18 @@ async def _grok_transcribe_segment(audio_24k, seg_id: str) -> str:
                 if msg.get("type") == "session.updated":
                     break
 
-            CHUNK = 48000
-            for i in range(0, len(pcm_bytes), CHUNK):
+            # Encode once. A 10 s window (~480 KB) goes out as one append
+            # event; anything larger is sliced from the encoded string, which
+            # maps 1:1 onto 3-byte blocks of the PCM.
+            audio_b64 = base64.b64encode(pcm_bytes).decode()
+            if pcm_bytes.nbytes > MAX_APPEND_BYTES:
+                step = APPEND_CHUNK // 3 * 4
+            else:
+                step = max(1, len(audio_b64))
+            for i in range(0, len(audio_b64), step):
                 await ws.send(json.dumps({
                     "type": "input_audio_buffer.append",
-                    "audio": base64.b64encode(pcm_bytes[i:i + CHUNK]).decode(),
+                    "audio": audio_b64[i:i + step],
                 }))
 
             await ws.send(json.dumps({"type": "input_audio_buffer.commit"}))
@@ -336,124 +444,190 @@ async def _grok_transcribe_segment(audio_24k, seg_id: str) -> str:
     return transcript.strip()
 
 
-def grok_transcribe_song(wav_path: Path, song_name: str) -> list[dict]:
+async def _grok_transcribe_with_retry(audio_24k, seg_id: str, sem: asyncio.Semaphore) -> str:
+    """Transcribe one segment (3 attempts), holding a slot of the semaphore."""
+    async with sem:
+        for attempt in range(3):
+            try:
+                return await asyncio.wait_for(
+                    _grok_transcribe_segment(audio_24k, seg_id), timeout=45
+                ) or ""
+            except (asyncio.TimeoutError, Exception) as exc:
+                if attempt < 2:
+                    await asyncio.sleep(1)
+                else:
+                    print(f"    [WARN] Segment {seg_id} failed after 3 attempts: {exc}")
+    return ""
+
+
+async def _grok_transcribe_all_segments(windows: list[tuple]) -> list[str]:
+    """Transcribe [(audio_24k, seg_id), ...] concurrently, preserving order."""
+    sem = asyncio.Semaphore(GROK_CONCURRENCY)
+    return await asyncio.gather(*[
+        _grok_transcribe_with_retry(audio_24k, seg_id, sem)
+        for audio_24k, seg_id in windows
+    ])
+
+
+def grok_transcribe_song(
+    wav_path: Path, song_name: str, load_y: Callable[[], np.ndarray] | None = None,
+) -> list[dict]:
     """
     Transcribe a full song in overlapping segments using Grok Voice API.
+    Up to GROK_CONCURRENCY segments are in flight at once, all on one event loop.
     Returns: [{"start": float, "end": float, "text": str}, ...]
     Cached in transcripts/{song_name}_grok_align.json.
+    Pass load_y (from lazy_song) to share one decode with other steps.
     """
     cache = TRANSCRIPTS_DIR / f"{song_name}_grok_align.json"
     if cache.exists():
         print(f"  [align cache] {cache.name}")
-        with open(cache) as f:
-            return json.load(f)
+        return _read_json(cache)
 
-    y, sr = librosa.load(str(wav_path), sr=SAMPLE_RATE, mono=True)
-    dur = len(y) / sr
-    segments = []
-    t = 0.0
-    seg_num = 0
+    y = load_y() if load_y is not None else load_song(wav_path)
+    dur = len(y) / SAMPLE_RATE
+
+    # Resample the whole song once (windows overlap 2×, so per-window
+    # resampling did twice the work and re-initialized the filter each time)
+    y24 = soxr.resample(y, SAMPLE_RATE, GROK_SR, quality="HQ")
 
+    # Build all windows up front, then transcribe them in one event loop
+    bounds = []
+    windows = []
+    t = 0.0
     while t < dur:
         e = min(t + SEG_DURATION, dur)
-        seg_audio = y[int(t * sr):int(e * sr)]
-        audio_24k = librosa.resample(seg_audio, orig_sr=SAMPLE_RATE, target_sr=GROK_SR)
-        seg_id = f"{song_name}_s{seg_num:03d}"
-        seg_num += 1
+        audio_24k = y24[int(t * GROK_SR):int(e * GROK_SR)]
+        windows.append((audio_24k, f"{song_name}_s{len(windows):03d}"))
+        bounds.append((t, e))
+        t += SEG_STEP
 
-        text = ""
-        for attempt in range(3):
-            try:
-                text = asyncio.run(
-                    asyncio.wait_for(_grok_transcribe_segment(audio_24k, seg_id), timeout=45)
-                ) or ""
-                break
-            except (asyncio.TimeoutError, Exception) as exc:
-                if attempt < 2:
-                    time.sleep(1)
-                else:
-                    print(f"    [WARN] Segment {seg_id} failed after 3 attempts: {exc}")
+    texts = asyncio.run(_grok_transcribe_all_segments(windows))
 
+    segments = []
+    for (t, e), text in zip(bounds, texts):
         segments.append({"start": round(t, 3), "end": round(e, 3), "text": text})
-
         if text and "[INSTRUMENTAL]" not in text.upper():
             print(f"    [{t:.0f}–{e:.0f}s] {text[:60]}...")
-        t += SEG_STEP
-        time.sleep(0.2)
 
-    with open(cache, "w") as f:
-        json.dump(segments, f, indent=2)
+    _write_json(cache, segments)
     return segments
 
 
+_CLEAN_RE = re.compile(r"[^a-z0-9\s']")
+
+
+# Memoized: the same lyric/transcript strings are cleaned over and over
+# inside grok_align_line's nested loops.
+@functools.lru_cache(maxsize=4096)
 def _clean_text(s: str) -> str:
-    return re.sub(r"[^a-z0-9\s']", "", s.lower()).strip()
+    return _CLEAN_RE.sub("", s.lower()).strip()
+
+
+@functools.lru_cache(maxsize=4096)
+def _words(s: str) -> tuple[str, ...]:
+    # tuple, not list — cached results are shared between callers
+    return tuple(_clean_text(s).split())
 
 
-def _words(s: str) -> list[str]:
-    return _clean_text(s).split()
+def _prepare_segments(segments: list[dict]) -> None:
+    """
+    Attach cleaned text ("_ct") and word tuple ("_tw") to each segment in
+    place, so grok_align_line doesn't re-tokenize every segment for every
+    lyric line. Called after the alignment cache is written, so the extra
+    keys never reach disk.
+    """
+    for seg in segments:
+        text = seg.get("text", "")
+        seg["_ct"] = _clean_text(text)
+        seg["_tw"] = _words(text)
+
+
+def _window_match_counts(lw: tuple[str, ...], tw: tuple[str, ...], cutoff: float) -> np.ndarray:
+    """
+    Sliding-window word match: entry i counts the positions j where lw[j]
+    fuzzy-matches tw[i + j] (fuzz.ratio > cutoff). The word×word match map
+    is filled by a single cdist call, so each window is just a diagonal sum
+    of it instead of len(lw) Python-level ratio calls.
+    """
+    hits = process.cdist(lw, tw, scorer=fuzz.ratio, score_cutoff=cutoff) > cutoff
+    n_pos = max(1, len(tw) - len(lw) + 1)
+    return np.array([np.trace(hits, offset=i) for i in range(n_pos)])
 
 
-def grok_align_line(lyric: str, segments: list[dict], duration: float) -> tuple[float, float, float]:
+def grok_align_line(
+    lyric: str, segments: list[dict], duration: float,
+    seq_scores: np.ndarray | None = None,
+) -> tuple[float, float, float]:
     """
     Given a lyric line and Grok-transcribed segments, find the best-matching
     segment and estimate the timestamp. Returns (start, end, confidence).
+
+    seq_scores, if given, holds the precomputed full-string score (0–1) of
+    this lyric against each segment (one row of the cdist matrix built in
+    grok_select_phrases), so strategy 3 is a lookup instead of a call.
+    Segments run through _prepare_segments() are not re-tokenized.
     """
     lw = _words(lyric)
     if not lw:
         return 0.0, MIN_PHRASE_DURATION, 0.0
+    lyric_clean = _clean_text(lyric)
+    lset = set(lw)
 
     best_seg = None
     best_score = 0.0
 
-    for seg in segments:
+    # Strategy 1 (word-set overlap) is a cheap hash lookup, so score it for
+    # every segment up front and visit segments best-overlap-first.
+    candidates = []
+    for si, seg in enumerate(segments):
         text = seg.get("text", "")
         if not text or "[INSTRUMENTAL]" in text.upper():
             continue
-        tw = _words(text)
+        tw = seg["_tw"] if "_tw" in seg else _words(text)
         if not tw:
             continue
-
-        # Strategy 1: word-set overlap
-        lset, tset = set(lw), set(tw)
-        overlap = len(lset & tset) / len(lset) if lset else 0
+        overlap = len(lset.intersection(tw)) / len(lset)
+        candidates.append((overlap, si, seg, tw))
+    candidates.sort(key=lambda c: c[0], reverse=True)
+
+    for overlap, si, seg, tw in candidates:
+        # Prefilter: once overlap is well below the best so far, stop paying
+        # for the sliding window. Precomputed seq scores are free, so keep
+        # checking those; without them every remaining segment is skipped.
+        full = overlap * 0.85 >= best_score - 0.05
+        if not full and seq_scores is None:
+            break
 
         # Strategy 2: consecutive-word sliding window
         consec = 0.0
-        if len(lw) >= 2:
-            for i in range(max(1, len(tw) - len(lw) + 1)):
-                window = tw[i:i + len(lw)]
-                m = sum(1 for a, b in zip(lw, window)
-                        if a == b or SequenceMatcher(None, a, b).ratio() > 0.75)
-                consec = max(consec, m / len(lw))
-
-        # Strategy 3: SequenceMatcher on full strings
-        seq = SequenceMatcher(None, _clean_text(lyric), _clean_text(text)).ratio()
+        if full and len(lw) >= 2:
+            consec = _window_match_counts(lw, tw, 75).max() / len(lw)
+
+        # Strategy 3: fuzz.ratio on full strings. Not WRatio: its partial and
+        # token-set scoring rates a lyric contained in a long transcript near
+        # 1.0, which would change what the score thresholds mean
+        if seq_scores is not None:
+            seq = float(seq_scores[si])
+        else:
+            seq = fuzz.ratio(lyric_clean, seg["_ct"] if "_ct" in seg else _clean_text(seg["text"])) / 100.0
 
         score = max(overlap * 0.85, consec * 0.95, seq)
         if score > best_score:
             best_score = score
             best_seg = seg
+        if seq >= 1.0:
+            break  # exact full-string match: no later segment can score higher
 
     if not best_seg or best_score < 0.15:
         return 0.0, MIN_PHRASE_DURATION, 0.0
 
     # Refine: estimate position within the matched segment
-    text = best_seg["text"]
-    tw = _words(text)
+    tw = best_seg["_tw"] if "_tw" in best_seg else _words(best_seg["text"])
     seg_start = best_seg["start"]
     seg_dur = best_seg["end"] - seg_start
 
-    best_pos = 0
-    best_r = 0.0
-    for i in range(max(1, len(tw) - len(lw) + 1)):
-        window = tw[i:i + len(lw)]
-        m = sum(1 for a, b in zip(lw, window)
-                if a == b or SequenceMatcher(None, a, b).ratio() > 0.7)
-        r = m / len(lw)
-        if r > best_r:
-            best_r = r
-            best_pos = i
+    best_pos = int(np.argmax(_window_match_counts(lw, tw, 70)))
 
     wps = len(tw) / seg_dur if seg_dur > 0 else 5.0
     est_start = seg_start + best_pos / wps
@@ -466,52 +640,106 @@ def grok_align_line(lyric: str, segments: list[dict], duration: float) -> tuple[
     return round(est_start, 3), round(est_end, 3), round(best_score, 3)
 
 
-def estimate_line_timestamps(wav_path: Path, num_lines: int) -> list[tuple[float, float]]:
+@numba.njit(cache=True)
+def _fit_segments(segments: np.ndarray, target: int) -> np.ndarray:
+    """
+    Split the longest / merge the closest (start, end) rows of an (N, 2)
+    float64 array until there are exactly `target` of them. JIT-compiled:
+    each split/merge is an O(N) scan and runs once per missing/extra line.
+    """
+    n = segments.shape[0]
+    seg = np.empty((max(n, target) + 1, 2))
+    seg[:n] = segments
+    count = n
+
+    # Too few runs: split the longest one in half
+    while count < target:
+        longest = 0
+        best = seg[0, 1] - seg[0, 0]
+        for k in range(1, count):
+            d = seg[k, 1] - seg[k, 0]
+            if d > best:
+                best = d
+                longest = k
+        s = seg[longest, 0]
+        e = seg[longest, 1]
+        for k in range(count, longest + 1, -1):
+            seg[k, 0] = seg[k - 1, 0]
+            seg[k, 1] = seg[k - 1, 1]
+        mid = (s + e) / 2
+        seg[longest, 1] = mid
+        seg[longest + 1, 0] = mid
+        seg[longest + 1, 1] = e
+        count += 1
+
+    # Too many runs: merge the pair with the smallest gap
+    while count > target and count > 1:
+        closest = 0
+        best = seg[1, 0] - seg[0, 1]
+        for k in range(1, count - 1):
+            g = seg[k + 1, 0] - seg[k, 1]
+            if g < best:
+                best = g
+                closest = k
+        seg[closest, 1] = seg[closest + 1, 1]
+        for k in range(closest + 1, count - 1):
+            seg[k, 0] = seg[k + 1, 0]
+            seg[k, 1] = seg[k + 1, 1]
+        count -= 1
+
+    return seg[:count].copy()
+
+
+def _audio_digest(wav_path: Path) -> str:
+    """SHA-1 of the audio file bytes (OpenSSL, hardware-accelerated where available)."""
+    with open(wav_path, "rb") as f:
+        return hashlib.file_digest(f, "sha1").hexdigest()
+
+
+# Bump when _estimate_line_timestamps() changes so stale caches are recomputed
+_ONSET_CACHE_VERSION = 1
+
+
+def estimate_line_timestamps(
+    wav_path: Path, num_lines: int, load_y: Callable[[], np.ndarray] | None = None,
+) -> list[tuple[float, float]]:
     """
     FALLBACK (used when Grok Voice API is unavailable / --no-grok).
-    Uses librosa onset detection to estimate where each lyric line falls.
-    NOTE: This is inaccurate — onset detection captures drums/bass, not just
-    vocals, and the linear mapping breaks on intros/bridges/choruses.
+    Uses librosa.effects.split (non-silent intervals) to estimate where each
+    lyric line falls, then splits/merges intervals to one per line.
+    NOTE: This is inaccurate — loudness gaps do not separate vocals from the
+    beat, and the linear mapping breaks on intros/bridges/choruses.
     Prefer grok_align_line() for accurate alignment.
+    Cached in transcripts/ keyed by the audio hash, line count and
+    _ONSET_CACHE_VERSION, so the result survives --force-realign and
+    re-downloads of identical audio.
     """
-    y, sr = librosa.load(str(wav_path), sr=SAMPLE_RATE, mono=True)
+    cache_path = (TRANSCRIPTS_DIR /
+                  f"{wav_path.stem}_onsets_{_audio_digest(wav_path)[:16]}_{num_lines}"
+                  f"_v{_ONSET_CACHE_VERSION}.npy")
+    if cache_path.exists():
+        return [tuple(row) for row in np.load(cache_path).tolist()]
+
+    timestamps = _estimate_line_timestamps(wav_path, num_lines, load_y)
+    np.save(cache_path, np.asarray(timestamps, dtype=np.float64).reshape(-1, 2))
+    return timestamps
+
+
+def _estimate_line_timestamps(
+    wav_path: Path, num_lines: int, load_y: Callable[[], np.ndarray] | None,
+) -> list[tuple[float, float]]:
+    y = load_y() if load_y is not None else load_song(wav_path)
+    sr = SAMPLE_RATE
     duration = len(y) / sr
 
-    onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=512)
-    onset_frames = librosa.onset.onset_detect(
-        onset_envelope=onset_env, sr=sr, hop_length=512,
-        backtrack=True, units="frames"
-    )
-    onset_times = librosa.frames_to_time(onset_frames, sr=sr, hop_length=512)
+    # Non-silent (start, end) intervals in one vectorized pass over the RMS envelope
+    intervals = librosa.effects.split(y, top_db=30, frame_length=2048, hop_length=512) / sr
 
-    if len(onset_times) < 2:
+    if len(intervals) == 0:
         line_dur = duration / num_lines
         return [(i * line_dur, (i + 1) * line_dur) for i in range(num_lines)]
 
-    segments = []
-    seg_start = onset_times[0]
-    seg_end = onset_times[0]
-    for t in onset_times[1:]:
-        if t - seg_end < 0.3:
-            seg_end = t
-        else:
-            segments.append((seg_start, seg_end))
-            seg_start = t
-            seg_end = t
-    segments.append((seg_start, seg_end))
-
-    while len(segments) < num_lines:
-        longest_idx = max(range(len(segments)),
-                         key=lambda i: segments[i][1] - segments[i][0])
-        s, e = segments[longest_idx]
-        mid = (s + e) / 2
-        segments[longest_idx:longest_idx+1] = [(s, mid), (mid, e)]
-
-    while len(segments) > num_lines and len(segments) > 1:
-        min_gap_idx = min(range(len(segments) - 1),
-                         key=lambda i: segments[i+1][0] - segments[i][1])
-        merged = (segments[min_gap_idx][0], segments[min_gap_idx + 1][1])
-        segments[min_gap_idx:min_gap_idx+2] = [merged]
+    segments = _fit_segments(intervals.astype(np.float64), num_lines)
 
     timestamps = []
     for i, (s, e) in enumerate(segments[:num_lines]):
@@ -525,7 +753,173 @@ def estimate_line_timestamps(wav_path: Path, num_lines: int) -> list[tuple[float
     return timestamps
 
 
-def grok_select_phrases(lyrics: dict, wav_path: Path, artist: str, title: str) -> list[dict]:
+# ── Grok text API: line selection, batched across songs ──
+
+GROK_CHAT_URL = "https://api.x.ai/v1/chat/completions"
+GROK_BATCH_SIZE = 4        # songs per chat request
+GROK_BATCH_WAIT = 0.5      # seconds to wait for more songs before flushing
+
+_SELECTION_CRITERIA = """- Punchy, iconic, quotable, or have strong energy
+- Complete thoughts (not fragments like "yeah" or "uh")
+- Suitable as standalone audio clips (1-4 seconds when spoken/rapped)
+
+Skip: ad-libs only, pure repetition of the same line, section headers like "[Chorus]", 
+very short filler lines ("yeah", "uh-huh", "what")."""
+
+
+def _numbered(lines: list[str]) -> str:
+    return "\n".join(f"{i}: {line}" for i, line in enumerate(lines))
+
+
+def _selection_prompt(artist: str, title: str, lines: list[str]) -> str:
+    """Single-song prompt: reply is a JSON array of line numbers."""
+    return f"""You are selecting the BEST rap lines from "{title}" by {artist} for a sound mosaic art project.
+
+Here are all the lyrics lines (numbered):
+
+{_numbered(lines)}
+
+Select the {min(MAX_CLIPS_PER_SONG, len(lines))} BEST lines that are:
+{_SELECTION_CRITERIA}
+
+Return ONLY a JSON array of line numbers (integers). Example: [0, 3, 5, 8, 12]
+Return ONLY the JSON array, no markdown, no explanation."""
+
+
+def _batch_selection_prompt(batch: list[tuple]) -> str:
+    """Multi-song prompt: reply is a JSON object {song number: [line numbers]}."""
+    songs = "\n\n".join(
+        f"""Song {n}: "{title}" by {artist} — select {min(MAX_CLIPS_PER_SONG, len(lines))} lines
+
+{_numbered(lines)}"""
+        for n, (artist, title, lines, _) in enumerate(batch)
+    )
+    return f"""You are selecting the BEST rap lines from {len(batch)} songs for a sound mosaic art project.
+
+Here are the lyrics of each song (songs and lines numbered):
+
+{songs}
+
+For EACH song, select the requested number of BEST lines that are:
+{_SELECTION_CRITERIA}
+
+Return ONLY a JSON object mapping each song number (as a string) to a JSON array
+of that song's line numbers (integers). Example: {{"0": [0, 3, 5], "1": [2, 4, 9]}}
+Return ONLY the JSON object, no markdown, no explanation."""
+
+
+def _grok_chat(prompt: str, system: str, max_tokens: int):
+    """One Grok chat completion; returns the reply parsed as JSON."""
+    response = _HTTP_SESSION.post(
+        GROK_CHAT_URL,
+        headers={
+            "Authorization": f"Bearer {XAI_API_KEY}",
+            "Content-Type": "application/json",
+        },
+        json={
+            "model": "grok-3-mini-fast",
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.3,
+            "max_tokens": max_tokens,
+        },
+        timeout=60,
+    )
+    response.raise_for_status()
+    result = orjson.loads(response.content)
+    content = result["choices"][0]["message"]["content"].strip()
+
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1] if "\n" in content else content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    content = content.strip()
+    if content.startswith("json"):
+        content = content[4:].strip()
+
+    return orjson.loads(content)
+
+
+class GrokBatcher:
+    """
+    Collects line-selection requests from the worker threads and sends up to
+    `batch_size` songs to Grok in one chat call. A batch is flushed early
+    once `max_wait` seconds pass, so a lone song never waits for company.
+    """
+
+    def __init__(self, batch_size: int = GROK_BATCH_SIZE, max_wait: float = GROK_BATCH_WAIT):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="grok-batcher", daemon=True).start()
+
+    def submit(self, artist: str, title: str, lines: list[str]) -> Future:
+        """Queue one song; the Future resolves to its selected line indices."""
+        future = Future()
+        self._queue.put((artist, title, lines, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch: list[tuple]):
+        try:
+            if len(batch) == 1:
+                artist, title, lines, _ = batch[0]
+                replies = [_grok_chat(
+                    _selection_prompt(artist, title, lines),
+                    "You are a precise JSON-only API. Return only valid JSON arrays of integers.",
+                    2000,
+                )]
+            else:
+                by_song = _grok_chat(
+                    _batch_selection_prompt(batch),
+                    "You are a precise JSON-only API. Return only valid JSON objects.",
+                    2000 * len(batch),
+                )
+                replies = [by_song.get(str(n)) for n in range(len(batch))]
+        except Exception as e:
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+
+        for n, ((_, _, lines, future), reply) in enumerate(zip(batch, replies)):
+            if not isinstance(reply, list):
+                future.set_exception(ValueError(f"no selection for song {n} in batched reply"))
+                continue
+            future.set_result([i for i in reply if isinstance(i, int) and 0 <= i < len(lines)])
+
+
+_GROK_BATCHER: GrokBatcher | None = None
+_GROK_BATCHER_LOCK = threading.Lock()
+
+
+def _grok_batcher() -> GrokBatcher:
+    """Shared batcher, started on first use (never in --no-grok runs)."""
+    global _GROK_BATCHER
+    with _GROK_BATCHER_LOCK:
+        if _GROK_BATCHER is None:
+            _GROK_BATCHER = GrokBatcher()
+        return _GROK_BATCHER
+
+
+def grok_select_phrases(
+    lyrics: dict, wav_path: Path, artist: str, title: str,
+    load_y: Callable[[], np.ndarray] | None = None,
+) -> list[dict]:
     """
     Use Grok text API to select the best lines, then Grok Voice API to
     align them to the audio with accurate timestamps.
@@ -542,64 +936,14 @@ def grok_select_phrases(lyrics: dict, wav_path: Path, artist: str, title: str) -
 
     if not XAI_API_KEY:
         print("  [WARN] No XAI_API_KEY — using onset fallback for all lines")
-        timestamps = estimate_line_timestamps(wav_path, len(lines))
+        timestamps = estimate_line_timestamps(wav_path, len(lines), load_y)
         return _lines_to_phrases(lines, timestamps)
 
-    # ── Step 1: Grok text API — select best lines ──
-    lines_str = "\n".join(f"{i}: {line}" for i, line in enumerate(lines))
-
-    prompt = f"""You are selecting the BEST rap lines from "{title}" by {artist} for a sound mosaic art project.
-
-Here are all the lyrics lines (numbered):
-
-{lines_str}
-
-Select the {min(MAX_CLIPS_PER_SONG, len(lines))} BEST lines that are:
-- Punchy, iconic, quotable, or have strong energy
-- Complete thoughts (not fragments like "yeah" or "uh")
-- Suitable as standalone audio clips (1-4 seconds when spoken/rapped)
-
-Skip: ad-libs only, pure repetition of the same line, section headers like "[Chorus]", 
-very short filler lines ("yeah", "uh-huh", "what").
-
-Return ONLY a JSON array of line numbers (integers). Example: [0, 3, 5, 8, 12]
-Return ONLY the JSON array, no markdown, no explanation."""
-
+    # ── Step 1: Grok text API — select best lines (batched across songs) ──
     selected_indices = list(range(len(lines)))  # fallback: all lines
     try:
-        response = requests.post(
-            "https://api.x.ai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {XAI_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": "grok-3-mini-fast",
-                "messages": [
-                    {"role": "system", "content": "You are a precise JSON-only API. Return only valid JSON arrays of integers."},
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": 0.3,
-                "max_tokens": 2000,
-            },
-            timeout=60,
-        )
-        response.raise_for_status()
-        result = response.json()
-        content = result["choices"][0]["message"]["content"].strip()
-
-        if content.startswith("```"):
-            content = content.split("\n", 1)[1] if "\n" in content else content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
-        if content.startswith("json"):
-            content = content[4:].strip()
-
-        selected_indices = json.loads(content)
-        selected_indices = [i for i in selected_indices if isinstance(i, int) and 0 <= i < len(lines)]
+        selected_indices = _grok_batcher().submit(artist, title, lines).result()
         print(f"    → Grok selected {len(selected_indices)} / {len(lines)} lines")
-
     except Exception as e:
         print(f"  [ERROR] Grok text API failed: {e}")
         print("  Using all lines...")
@@ -607,15 +951,14 @@ Return ONLY the JSON array, no markdown, no explanation."""
     # ── Step 2: Grok Voice API — transcribe song for alignment ──
     song_name = wav_path.stem
     try:
-        grok_segments = grok_transcribe_song(wav_path, song_name)
+        grok_segments = grok_transcribe_song(wav_path, song_name, load_y)
     except Exception as e:
         print(f"  [ERROR] Grok Voice transcription failed: {e}")
         print("  Falling back to onset heuristic...")
         grok_segments = None
 
-    # Get song duration
-    info = sf.info(str(wav_path))
-    duration = info.duration
+    # Get song duration (header only — the audio may never need decoding)
+    duration = sf.info(str(wav_path)).duration
 
     # ── Step 3: Align selected lines ──
     phrases = []
@@ -623,9 +966,34 @@ Return ONLY the JSON array, no markdown, no explanation."""
     onset_timestamps = None  # lazy-computed fallback
 
     if grok_segments:
-        for idx in selected_indices:
+        # Alignment is a pure function of these inputs, so memoize it on disk
+        # with their hash — any change to lyrics/transcript/selection misses.
+        # One file per song, overwritten on a miss, so stale keys don't pile up
+        align_key = hashlib.blake2b(orjson.dumps({
+            "lines": lines, "segs": grok_segments,
+            "sel": selected_indices, "dur": duration, "scorer": "ratio",
+        })).hexdigest()[:16]
+        align_cache = TRANSCRIPTS_DIR / f"{song_name}_align.json"
+        if align_cache.exists():
+            cached = _read_json(align_cache)
+            if cached.get("key") == align_key:
+                print(f"  [align cache] {align_cache.name}")
+                return cached["phrases"]
+
+        # Full-string scores for every (selected line, segment) pair in one
+        # multithreaded C++ call instead of one ratio per pair in Python
+        _prepare_segments(grok_segments)
+        lyric_texts = [_clean_text(lines[i]) for i in selected_indices]
+        seg_texts = [seg["_ct"] for seg in grok_segments]
+        seq_matrix = process.cdist(
+            lyric_texts, seg_texts, scorer=fuzz.ratio, workers=-1,
+        ) / 100.0
+
+        for row, idx in enumerate(selected_indices):
             lyric = lines[idx]
-            start, end, confidence = grok_align_line(lyric, grok_segments, duration)
+            start, end, confidence = grok_align_line(
+                lyric, grok_segments, duration, seq_matrix[row],
+            )
 
             if confidence >= 0.25:
                 phrases.append({
@@ -639,7 +1007,7 @@ Return ONLY the JSON array, no markdown, no explanation."""
                 # Fall back to onset heuristic for this line
                 onset_fallback_count += 1
                 if onset_timestamps is None:
-                    onset_timestamps = estimate_line_timestamps(wav_path, len(lines))
+                    onset_timestamps = estimate_line_timestamps(wav_path, len(lines), load_y)
                 if idx < len(onset_timestamps):
                     s, e = onset_timestamps[idx]
                     phrases.append({
@@ -652,9 +1020,10 @@ Return ONLY the JSON array, no markdown, no explanation."""
 
         if onset_fallback_count:
             print(f"    → {onset_fallback_count} lines fell back to onset heuristic")
+        _write_json(align_cache, {"key": align_key, "phrases": phrases})
     else:
         # Full onset fallback
-        timestamps = estimate_line_timestamps(wav_path, len(lines))
+        timestamps = estimate_line_timestamps(wav_path, len(lines), load_y)
         for idx in selected_indices:
             if idx < len(timestamps):
                 start, end = timestamps[idx]
@@ -690,66 +1059,97 @@ def _lines_to_phrases(lines: list[str], timestamps: list[tuple[float, float]]) -
 # STEP 4: Chop audio at phrase-aligned boundaries
 # ──────────────────────────────────────────────────────────────────────────────
 
+@dataclass(slots=True)
+class Clip:
+    """One chopped clip. Field order is the key order in clip_metadata.json."""
+    clip_file: str
+    artist: str
+    title: str
+    lyric: str
+    start_time: float
+    end_time: float
+    duration: float
+    rms: float
+    song_index: int
+    clip_index: int
+    explicit: bool = False   # tagged in generate_outputs
+
+
 def chop_song_by_phrases(
     wav_path: Path, phrases: list[dict],
     artist: str, title: str, song_idx: int,
     clip_dir: Path
-) -> list[dict]:
+) -> list[Clip]:
     """
     Chop audio at estimated phrase boundaries from lyrics + onset alignment.
     Each clip = one complete rap phrase with accurate lyrics.
+    Only the phrase windows are read from disk (seek + read), never the
+    whole song. Clip writes go to a small thread pool so encoding/disk I/O
+    overlaps with reading the next window.
     """
     print(f"  Chopping: {artist} — {title} ({len(phrases)} phrases)")
 
     try:
-        y, sr = librosa.load(str(wav_path), sr=SAMPLE_RATE, mono=True)
+        snd = sf.SoundFile(str(wav_path))
     except Exception as e:
         print(f"  [ERROR] load failed: {e}")
         return []
 
-    duration = len(y) / sr
     clips_meta = []
     safe_artist = "".join(c for c in artist if c.isalnum() or c in "_-")
     safe_title = "".join(c for c in title.replace(" ", "_") if c.isalnum() or c in "_-")
 
-    for ci, phrase in enumerate(phrases[:MAX_CLIPS_PER_SONG]):
-        start = phrase["start"]
-        end = phrase["end"]
+    writes = []
+    with snd, ThreadPoolExecutor(max_workers=4) as writer:
+        sr = snd.samplerate
+        duration = snd.frames / sr
 
-        # Add small padding (50ms) for natural sound
-        start_padded = max(0, start - 0.05)
-        end_padded = min(duration, end + 0.05)
+        for ci, phrase in enumerate(phrases[:MAX_CLIPS_PER_SONG]):
+            start = phrase["start"]
+            end = phrase["end"]
 
-        phrase_dur = end_padded - start_padded
-        if phrase_dur < MIN_PHRASE_DURATION or phrase_dur > MAX_PHRASE_DURATION + 0.5:
-            continue
+            # Add small padding (50ms) for natural sound
+            start_padded = max(0, start - 0.05)
+            end_padded = min(duration, end + 0.05)
 
-        start_sample = int(start_padded * sr)
-        end_sample = int(end_padded * sr)
-        clip_audio = y[start_sample:end_sample]
+            phrase_dur = end_padded - start_padded
+            if phrase_dur < MIN_PHRASE_DURATION or phrase_dur > MAX_PHRASE_DURATION + 0.5:
+                continue
 
-        # Skip near-silent clips
-        rms_val = float(np.sqrt(np.mean(clip_audio ** 2)))
-        if rms_val < 0.005:
-            continue
+            start_sample = int(start_padded * sr)
+            end_sample = int(end_padded * sr)
+            snd.seek(start_sample)
+            clip_audio = snd.read(end_sample - start_sample, dtype="float32", always_2d=False)
+            if clip_audio.ndim > 1:
+                clip_audio = clip_audio.mean(axis=1)
 
-        clip_name = f"{song_idx:03d}_{safe_artist}_{safe_title}_p{ci:03d}.wav"
-        clip_path = clip_dir / clip_name
-        sf.write(str(clip_path), clip_audio, sr)
-
-        clips_meta.append({
-            "clip_file": clip_name,
-            "artist": artist,
-            "title": title,
-            "lyric": phrase["lyric"],
-            "start_time": round(start, 3),
-            "end_time": round(end, 3),
-            "duration": round(phrase_dur, 3),
-            "rms": round(rms_val, 4),
-            "song_index": song_idx,
-            "clip_index": ci,
-        })
+            # Skip near-silent clips (dot product = sum of squares, no x**2 temporary)
+            rms_val = float(np.sqrt(np.dot(clip_audio, clip_audio) / max(1, clip_audio.size)))
+            if rms_val < 0.005:
+                continue
 
+            clip_name = f"{song_idx:03d}_{safe_artist}_{safe_title}_p{ci:03d}.wav"
+            clip_path = clip_dir / clip_name
+            # float32 in, explicit PCM_16 out — no dtype guessing in libsndfile
+            writes.append(writer.submit(
+                sf.write, str(clip_path), clip_audio, sr, subtype="PCM_16",
+            ))
+
+            clips_meta.append(Clip(
+                clip_file=clip_name,
+                artist=artist,
+                title=title,
+                lyric=phrase["lyric"],
+                start_time=round(start, 3),
+                end_time=round(end, 3),
+                duration=round(phrase_dur, 3),
+                rms=round(rms_val, 4),
+                song_index=song_idx,
+                clip_index=ci,
+            ))
+
+    for w in writes:
+        w.result()  # surface any write error, as the inline write used to
     print(f"    → {len(clips_meta)} clips saved")
     return clips_meta
 
@@ -759,7 +1159,7 @@ def chop_song_by_phrases(
 # ──────────────────────────────────────────────────────────────────────────────
 
 # Words/patterns that make a clip "explicit"
-EXPLICIT_WORDS = {
+EXPLICIT_WORDS = frozenset({
     # Slurs & variants
     "nigga", "niggas", "nigger", "niggers", "niggaz",
     # Hard profanity
@@ -776,56 +1176,62 @@ EXPLICIT_WORDS = {
     "cocaine", "crack", "molly", "ecstasy", "heroin",
     # Violent
     "kill", "murder", "murdered", "shooting", "shoot",
-}
+})
+
+
+# One alternation, longest words first so "motherfucker" wins over "fucker"
+_EXPLICIT_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(w) for w in sorted(EXPLICIT_WORDS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
 
 
 def is_explicit(lyric: str) -> bool:
     """Check if a lyric line contains explicit content."""
-    words = set(re.sub(r'[^a-zA-Z\s\']', '', lyric.lower()).split())
-    return bool(words & EXPLICIT_WORDS)
+    return _EXPLICIT_RE.search(lyric) is not None
 
 
-def generate_outputs(all_clips: list[dict]):
-    # Tag each clip as explicit or clean
-    for clip in all_clips:
-        clip["explicit"] = is_explicit(clip.get("lyric", ""))
+def generate_outputs(all_clips: list[Clip]):
+    # Columnar view of the clips: each output is built from one column and
+    # the clean subset is selected with a numpy mask instead of re-walking
+    # the records
+    n = len(all_clips)
+    lyrics = [clip.lyric for clip in all_clips]
+    list_lines = [f"rap_clips/{clip.clip_file}\n" for clip in all_clips]
+    lyric_lines = [f"{clip.artist}: {clip.lyric}\n" for clip in all_clips]
+    explicit = np.fromiter(map(is_explicit, lyrics), dtype=bool, count=n)
+    clean_idx = np.flatnonzero(~explicit).tolist()
+    clean_list = [list_lines[i] for i in clean_idx]
+    clean_lyrics = [lyric_lines[i] for i in clean_idx]
 
-    clean_clips = [c for c in all_clips if not c["explicit"]]
-    explicit_clips = [c for c in all_clips if c["explicit"]]
+    # Tag each clip as explicit or clean (kept in clip_metadata.json)
+    for clip, flag in zip(all_clips, explicit.tolist()):
+        clip.explicit = flag
 
-    print(f"  Content filter: {len(clean_clips)} clean, {len(explicit_clips)} explicit")
+    n_clean = len(clean_list)
+    print(f"  Content filter: {n_clean} clean, {n - n_clean} explicit")
 
     # ── ALL clips (explicit) ──
-    with open(CLIPS_LIST_FILE, "w") as f:
-        for clip in all_clips:
-            f.write(f"rap_clips/{clip['clip_file']}\n")
-    print(f"  → {CLIPS_LIST_FILE.name}: {len(all_clips)} clips (all)")
+    _write_lines(CLIPS_LIST_FILE, list_lines)
+    print(f"  → {CLIPS_LIST_FILE.name}: {n} clips (all)")
 
     # ── CLEAN clips only ──
     clean_list_file = BASE_DIR / "rap-clips-clean.txt"
-    with open(clean_list_file, "w") as f:
-        for clip in clean_clips:
-            f.write(f"rap_clips/{clip['clip_file']}\n")
-    print(f"  → {clean_list_file.name}: {len(clean_clips)} clips (clean)")
+    _write_lines(clean_list_file, clean_list)
+    print(f"  → {clean_list_file.name}: {n_clean} clips (clean)")
 
     # ── CLEAN lyrics (for ChucK display) ──
     clean_lyrics_file = BASE_DIR / "clip_lyrics_clean.txt"
-    with open(clean_lyrics_file, "w") as f:
-        for clip in clean_clips:
-            f.write(f"{clip['artist']}: {clip['lyric']}\n")
+    _write_lines(clean_lyrics_file, clean_lyrics)
     print(f"  → {clean_lyrics_file.name}")
 
-    # clip_metadata.json (all clips, with explicit flag)
-    with open(METADATA_FILE, "w") as f:
-        json.dump(all_clips, f, indent=2)
+    # clip_metadata.json (all clips, with explicit flag) — orjson serializes
+    # slots dataclasses directly, no asdict() round trip
+    _write_json(METADATA_FILE, all_clips)
     print(f"  → {METADATA_FILE.name}")
 
     # clip_lyrics.txt (for ChucK — all)
-    with open(LYRICS_FILE, "w") as f:
-        for clip in all_clips:
-            lyric = clip.get("lyric", "")
-            artist = clip.get("artist", "")
-            f.write(f"{artist}: {lyric}\n")
+    _write_lines(LYRICS_FILE, lyric_lines)
     print(f"  → {LYRICS_FILE.name}")
 
 
@@ -833,8 +1239,6 @@ def generate_outputs(all_clips: list[dict]):
 # MAIN (parallelized)
 # ──────────────────────────────────────────────────────────────────────────────
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
 # Max parallel workers for I/O-bound tasks (lyrics API, Grok API)
 MAX_WORKERS_IO = 8
 # Max parallel workers for CPU-bound tasks (librosa onset analysis, audio chop)
@@ -851,32 +1255,33 @@ def _fetch_lyrics_task(args_tuple):
 
 def _process_song_task(args_tuple):
     """
-    Worker for parallel Step 3+4: phrase selection + audio alignment + chopping.
-    Each song is independent so this parallelizes well.
+    Worker for parallel Step 3: phrase selection + audio alignment.
+    Each song is independent so this parallelizes well. Chopping (Step 4)
+    runs separately in a process pool — see main().
     """
     wav_path, artist, title, idx, lyrics, use_grok, clip_dir = args_tuple
 
     # Check phrase cache first
-    phrase_cache = TRANSCRIPTS_DIR / f"{safe_name(idx, artist, title)}_phrases.json"
+    name = safe_name(idx, artist, title)
+    phrase_cache = TRANSCRIPTS_DIR / f"{name}_phrases.json"
     if phrase_cache.exists():
         print(f"  [cache] {phrase_cache.name}")
-        with open(phrase_cache) as f:
-            phrases = json.load(f)
+        phrases = _read_json(phrase_cache)
     else:
         print(f"  Processing: {artist} — {title} ({lyrics['num_lines']} lines)...")
+        # Decoded on first use only — transcription and onset fallback share
+        # the buffer, and warm transcript/align caches never decode at all
+        load_y = lazy_song(wav_path)
         if use_grok and XAI_API_KEY:
-            phrases = grok_select_phrases(lyrics, wav_path, artist, title)
+            phrases = grok_select_phrases(lyrics, wav_path, artist, title, load_y)
         else:
-            timestamps = estimate_line_timestamps(wav_path, len(lyrics["lines"]))
+            timestamps = estimate_line_timestamps(wav_path, len(lyrics["lines"]), load_y)
             phrases = _lines_to_phrases(lyrics["lines"], timestamps)
 
         # Cache
-        with open(phrase_cache, "w") as f:
-            json.dump(phrases, f, indent=2)
+        _write_json(phrase_cache, phrases)
 
-    # Chop immediately (no need to wait for other songs)
-    clips = chop_song_by_phrases(wav_path, phrases, artist, title, idx, clip_dir)
-    return idx, phrases, clips
+    return idx, phrases
 
 
 def main():
@@ -892,6 +1297,9 @@ def main():
                         help=f"Number of parallel workers (default {MAX_WORKERS_IO})")
     args = parser.parse_args()
 
+    # Clear old clips — rap_clips/ holds nothing but generated WAVs, so drop
+    # the whole directory rather than unlinking thousands of files one by one
+    shutil.rmtree(RAP_CLIPS_DIR, ignore_errors=True)
     for d in [FULL_SONGS_DIR, RAP_CLIPS_DIR, TRANSCRIPTS_DIR]:
         d.mkdir(parents=True, exist_ok=True)
 
@@ -901,30 +1309,27 @@ def main():
         for f in TRANSCRIPTS_DIR.glob("*_phrases.json"):
             f.unlink()
             print(f"  deleted {f.name}")
-        for f in TRANSCRIPTS_DIR.glob("*_grok_align.json"):
+        # *_align.json also covers *_grok_align.json; *_align_*.json sweeps
+        # the hash-named align caches older versions left behind;
+        # grok_align_*.json are realign_lyrics.py's content-keyed copies of
+        # the same transcripts, which it would otherwise keep serving
+        stale = {f for pattern in ("*_align.json", "*_align_*.json", "grok_align_*.json")
+                 for f in TRANSCRIPTS_DIR.glob(pattern)}
+        for f in sorted(stale):
             f.unlink()
             print(f"  deleted {f.name}")
 
-    # Clear old clips
-    for f in RAP_CLIPS_DIR.glob("*.wav"):
-        f.unlink()
-
     artists_filter = None
     if args.artists:
         artists_filter = [a.strip().lower() for a in args.artists.split(",")]
 
-    # ── STEP 1: Download (sequential — yt-dlp handles its own concurrency) ──
+    # ── STEP 1: Download (PARALLEL — one yt-dlp subprocess per worker) ──
     songs = []
     if not args.skip_download:
         print("\n" + "=" * 60)
-        print("STEP 1: Downloading rap songs from YouTube")
+        print(f"STEP 1: Downloading rap songs from YouTube ({args.workers} workers)")
         print("=" * 60)
-        for i, (artist, title, url) in enumerate(RAP_SONGS):
-            if artists_filter and not any(a in artist.lower() for a in artists_filter):
-                continue
-            path = download_song(artist, title, url, i)
-            if path and path.exists():
-                songs.append((path, artist, title, i))
+        songs = download_all_songs(artists_filter, args.workers)
     else:
         print("\n[skip-download] Using existing files")
         for i, (artist, title, url) in enumerate(RAP_SONGS):
@@ -940,56 +1345,78 @@ def main():
 
     print(f"\n{len(songs)} songs ready for processing")
 
-    # ── STEP 2: Fetch lyrics (PARALLEL — all HTTP requests at once) ──
-    print("\n" + "=" * 60)
-    print(f"STEP 2: Fetching lyrics from lyrics-api ({args.workers} workers)")
-    print("=" * 60)
-    all_lyrics = {}
-    with ThreadPoolExecutor(max_workers=args.workers) as pool:
-        futures = {pool.submit(_fetch_lyrics_task, s): s for s in songs}
-        for future in as_completed(futures):
-            idx, lyrics = future.result()
-            if lyrics and lyrics.get("lines"):
-                all_lyrics[idx] = lyrics
-            else:
-                s = futures[future]
-                print(f"  [SKIP] No lyrics for {s[1]} — {s[2]}")
-
-    print(f"\n{len(all_lyrics)} songs with lyrics")
-
-    # ── STEP 3+4: Phrase selection + alignment + chopping (PARALLEL) ──
-    print("\n" + "=" * 60)
-    print(f"STEP 3+4: Phrase selection + chopping ({args.workers} workers)")
+    # ── STEP 2–4: Lyrics → phrase selection → chopping (PIPELINED) ──
+    # No barrier between steps: a song's phrase selection is submitted as
+    # soon as its lyrics arrive, and its chop as soon as its phrases do.
+    # Lyrics and Grok phrase selection are API-bound (IO threads). Chopping,
+    # and the librosa-only phrase path used without Grok, are CPU-bound and
+    # go to the process pool so they neither fight over the GIL nor tie up
+    # the IO workers sized for HTTP.
     use_grok = not args.no_grok
+    grok_active = use_grok and bool(XAI_API_KEY)
+    print("\n" + "=" * 60)
+    print(f"STEP 2–4: Lyrics ({args.workers} threads) → phrase selection "
+          f"({'threads' if grok_active else 'processes'}) → chopping ({MAX_WORKERS_CPU} processes)")
     if use_grok:
         print(f"  (using Grok API: {'YES' if XAI_API_KEY else 'NO — using all lines'})")
     print("=" * 60)
 
+    # Results land in per-song slots (position in `songs`), so the clip order
+    # before the seeded shuffle is the song order, not completion order
     all_phrases = {}
-    all_clips = []
-    task_args = [
-        (wav_path, artist, title, idx, all_lyrics[idx], use_grok, RAP_CLIPS_DIR)
-        for wav_path, artist, title, idx in songs
-        if idx in all_lyrics
-    ]
-
-    with ThreadPoolExecutor(max_workers=args.workers) as pool:
-        futures = {pool.submit(_process_song_task, ta): ta for ta in task_args}
-        for future in as_completed(futures):
-            try:
-                idx, phrases, clips = future.result()
-                all_phrases[idx] = phrases
-                all_clips.extend(clips)
-            except Exception as e:
-                ta = futures[future]
-                print(f"  [ERROR] {ta[1]} — {ta[2]}: {e}")
-
+    per_song_clips = [None] * len(songs)
+    songs_with_lyrics = 0
+    # CPU workers come from a forkserver, not fork: by the first submit the IO
+    # threads (and GrokBatcher / rapidfuzz threads) are already running, and
+    # forking a threaded process can deadlock a child on a held lock
+    with ThreadPoolExecutor(max_workers=args.workers) as pool, \
+            ProcessPoolExecutor(max_workers=MAX_WORKERS_CPU,
+                                mp_context=multiprocessing.get_context("forkserver")) as cpu_pool:
+        phrase_pool = pool if grok_active else cpu_pool
+        pending = {pool.submit(_fetch_lyrics_task, s): ("lyrics", slot, s)
+                   for slot, s in enumerate(songs)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, slot, ta = pending.pop(future)
+
+                if stage == "lyrics":
+                    idx, lyrics = future.result()
+                    if not (lyrics and lyrics.get("lines")):
+                        print(f"  [SKIP] No lyrics for {ta[1]} — {ta[2]}")
+                        continue
+                    songs_with_lyrics += 1
+                    wav_path, artist, title, _ = ta
+                    ta = (wav_path, artist, title, idx, lyrics, use_grok, RAP_CLIPS_DIR)
+                    pending[phrase_pool.submit(_process_song_task, ta)] = ("phrases", slot, ta)
+
+                elif stage == "phrases":
+                    try:
+                        idx, phrases = future.result()
+                    except Exception as e:
+                        print(f"  [ERROR] {ta[1]} — {ta[2]}: {e}")
+                        continue
+                    all_phrases[idx] = phrases
+                    wav_path, artist, title, _, _, _, clip_dir = ta
+                    pending[cpu_pool.submit(
+                        chop_song_by_phrases, wav_path, phrases, artist, title, idx, clip_dir,
+                    )] = ("chop", slot, ta)
+
+                else:  # chop
+                    try:
+                        per_song_clips[slot] = future.result()
+                    except Exception as e:
+                        print(f"  [ERROR] chop {ta[1]} — {ta[2]}: {e}")
+
+    all_clips = list(chain.from_iterable(filter(None, per_song_clips)))
+
+    print(f"\n{songs_with_lyrics} songs with lyrics")
     total_phrases = sum(len(p) for p in all_phrases.values())
     print(f"\n{total_phrases} total phrases across {len(all_phrases)} songs")
 
-    # Shuffle for KNN variety
-    random.seed(42)
-    random.shuffle(all_clips)
+    # Shuffle for KNN variety: one seeded index permutation + a single gather
+    perm = np.random.default_rng(42).permutation(len(all_clips))
+    all_clips = [all_clips[i] for i in perm.tolist()]
 
     print(f"Total clips: {len(all_clips)}")
 
@@ -1000,8 +1427,8 @@ def main():
     generate_outputs(all_clips)
 
     # Summary
-    artists_in_db = set(c["artist"] for c in all_clips)
-    avg_dur = sum(c["duration"] for c in all_clips) / max(len(all_clips), 1)
+    artists_in_db = set(c.artist for c in all_clips)
+    avg_dur = sum(c.duration for c in all_clips) / max(len(all_clips), 1)
     print("\n" + "=" * 60)
     print("DONE! Lyric-aligned database ready.")
     print("=" * 60)
@@ -1011,7 +1438,7 @@ def main():
     print(f"  Avg length: {avg_dur:.2f}s")
     print(f"\nSample clips:")
     for c in all_clips[:5]:
-        print(f'  [{c["clip_file"]}] "{c["lyric"]}" ({c["duration"]}s)')
+        print(f'  [{c.clip_file}] "{c.lyric}" ({c.duration}s)')
     print(f"\nNext: chuck --silent extract-rap-db.ck")
 
 
@@ -9,15 +9,23 @@ Usage:
   uv run python crawl_podcasts.py              # download all
   uv run python crawl_podcasts.py --list       # show what's available
   uv run python crawl_podcasts.py --only bbc   # download one by key
+  uv run python crawl_podcasts.py --only bbc,vox,ted   # download several in parallel
 """
 
 import argparse
+import os
 import subprocess
 import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 BASE_DIR = Path(__file__).parent
 SAMPLE_RATE = 44100
+# Max concurrent yt-dlp downloads (each is its own IO-bound subprocess)
+MAX_WORKERS = 8
+DOWNLOAD_TIMEOUT = 300     # seconds per yt-dlp run
 
 # ──────────────────────────────────────────────────────────────────────────────
 # PODCAST / TALK DATABASE
@@ -87,17 +95,32 @@ PODCASTS = [
 ]
 
 
-def download_podcast(key, title, subtitle, host, url, trim, force=False):
-    """Download a single podcast from YouTube as 44.1 kHz mono WAV."""
+def scan_podcasts():
+    """Map each podcast_* file in BASE_DIR to its size in bytes (one scandir)."""
+    with os.scandir(BASE_DIR) as it:
+        return {e.name: e.stat().st_size for e in it
+                if e.name.startswith("podcast_") and e.is_file()}
+
+
+def download_podcast(key, title, subtitle, host, url, trim, force=False, log=print,
+                     on_disk=None):
+    """Download a single podcast from YouTube as 44.1 kHz mono WAV.
+
+    Progress goes through `log` so parallel downloads can buffer their
+    output and print it in one piece when they finish. `on_disk` is a
+    scan_podcasts() result to reuse instead of checking the file again.
+    """
     out_path = BASE_DIR / f"podcast_{key}.wav"
+    if on_disk is None:
+        on_disk = scan_podcasts()
 
-    if out_path.exists() and not force:
-        size_mb = out_path.stat().st_size / 1e6
-        print(f"  [skip] podcast_{key}.wav already exists ({size_mb:.1f} MB)")
+    if out_path.name in on_disk and not force:
+        size_mb = on_disk[out_path.name] / 1e6
+        log(f"  [skip] podcast_{key}.wav already exists ({size_mb:.1f} MB)")
         return True
 
-    print(f"  [{key}] Downloading: {title} — {subtitle}")
-    print(f"         {url}")
+    log(f"  [{key}] Downloading: {title} — {subtitle}")
+    log(f"         {url}")
 
     cmd = [
         sys.executable, "-m", "yt_dlp",
@@ -120,32 +143,56 @@ def download_podcast(key, title, subtitle, host, url, trim, force=False):
     cmd.append(url)
 
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        if result.returncode != 0:
-            err = [l for l in result.stderr.split("\n") if "ERROR" in l]
-            print(f"  [ERROR] yt-dlp failed: {' '.join(err)[:300]}")
-            # Print full stderr for debugging
+        # Stream stderr instead of buffering all of it: keep only the ERROR
+        # lines and a short tail for the failure report
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                text=True, errors="replace")
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        watchdog = threading.Timer(DOWNLOAD_TIMEOUT, _kill)
+        watchdog.start()
+        err, tail = [], deque(maxlen=40)
+        try:
+            for line in proc.stderr:
+                if "ERROR" in line:
+                    err.append(line.rstrip("\n"))
+                tail.append(line)
+            proc.wait()
+        finally:
+            watchdog.cancel()
+            proc.stderr.close()
+
+        if timed_out.is_set():
+            log(f"  [ERROR] Download timed out")
+            return False
+        if proc.returncode != 0:
+            log(f"  [ERROR] yt-dlp failed: {' '.join(err)[:300]}")
+            # Print the tail of stderr for debugging
             if not err:
-                print(f"  [STDERR] {result.stderr[-500:]}")
+                log(f"  [STDERR] {''.join(tail)[-500:]}")
             return False
-    except subprocess.TimeoutExpired:
-        print(f"  [ERROR] Download timed out")
-        return False
     except Exception as e:
-        print(f"  [ERROR] {e}")
+        log(f"  [ERROR] {e}")
         return False
 
-    if out_path.exists():
+    try:
         size_mb = out_path.stat().st_size / 1e6
-        print(f"  [OK] podcast_{key}.wav ({size_mb:.1f} MB)")
+    except FileNotFoundError:
+        size_mb = None
+    if size_mb is not None:
+        log(f"  [OK] podcast_{key}.wav ({size_mb:.1f} MB)")
         return True
     else:
         # yt-dlp might have saved with a slightly different name
         for f in BASE_DIR.glob(f"podcast_{key}.*"):
             if f.suffix == ".wav":
-                print(f"  [OK] {f.name}")
+                log(f"  [OK] {f.name}")
                 return True
-        print(f"  [WARN] File not found after download")
+        log(f"  [WARN] File not found after download")
         return False
 
 
@@ -153,49 +200,67 @@ def main():
     parser = argparse.ArgumentParser(description="Download deepfake-themed podcasts")
     parser.add_argument("--list", action="store_true", help="List available podcasts")
     parser.add_argument("--only", type=str, default=None,
-                        help="Download only this key (e.g. 'bbc')")
+                        help="Download only these comma-separated keys (e.g. 'bbc' or 'bbc,vox')")
     parser.add_argument("--force", action="store_true",
                         help="Re-download even if file exists")
     args = parser.parse_args()
 
+    on_disk = scan_podcasts()
+
     if args.list:
         print("\nAvailable podcasts:\n")
         for key, title, subtitle, host, url, trim in PODCASTS:
-            out = BASE_DIR / f"podcast_{key}.wav"
-            status = "✓" if out.exists() else "✗"
-            size = f" ({out.stat().st_size / 1e6:.1f} MB)" if out.exists() else ""
+            nbytes = on_disk.get(f"podcast_{key}.wav")
+            status = "✓" if nbytes is not None else "✗"
+            size = f" ({nbytes / 1e6:.1f} MB)" if nbytes is not None else ""
             print(f"  [{status}] {key:8s}  {title} — {subtitle}{size}")
         print()
         return
 
     targets = PODCASTS
     if args.only:
-        targets = [(k, t, s, h, u, tr) for k, t, s, h, u, tr in PODCASTS
-                    if k == args.only]
-        if not targets:
-            print(f"Unknown key: {args.only}")
+        wanted = {k.strip() for k in args.only.split(",") if k.strip()}
+        unknown = wanted - {k for k, *_ in PODCASTS}
+        if not wanted:
+            print("No keys given to --only")
+            print(f"Available: {', '.join(k for k, *_ in PODCASTS)}")
+            return
+        if unknown:
+            print(f"Unknown key(s): {', '.join(sorted(unknown))}")
             print(f"Available: {', '.join(k for k, *_ in PODCASTS)}")
             return
+        targets = [p for p in PODCASTS if p[0] in wanted]
 
     print(f"\n{'=' * 60}")
     print(f"Downloading {len(targets)} podcast(s)")
     print(f"{'=' * 60}\n")
 
+    def _download(target):
+        lines = []
+        result = download_podcast(*target, force=args.force, log=lines.append,
+                                  on_disk=on_disk)
+        return result, lines
+
     ok = 0
-    for key, title, subtitle, host, url, trim in targets:
-        if download_podcast(key, title, subtitle, host, url, trim, args.force):
-            ok += 1
-        print()
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(targets))) as pool:
+        futures = [pool.submit(_download, t) for t in targets]
+        for future in as_completed(futures):
+            result, lines = future.result()
+            print("\n".join(lines))
+            print()
+            if result:
+                ok += 1
 
     print(f"\n{'=' * 60}")
     print(f"Done: {ok}/{len(targets)} podcasts ready")
     print(f"{'=' * 60}")
 
     # Show what's on disk
-    existing = sorted(BASE_DIR.glob("podcast_*.wav"))
+    existing = sorted((name, nbytes) for name, nbytes in scan_podcasts().items()
+                      if name.endswith(".wav"))
     print(f"\nPodcast files on disk:")
-    for f in existing:
-        print(f"  {f.name}  ({f.stat().st_size / 1e6:.1f} MB)")
+    for name, nbytes in existing:
+        print(f"  {name}  ({nbytes / 1e6:.1f} MB)")
 
 
 if __name__ == "__main__":
@@ -17,15 +17,24 @@ Usage:
 
 import os
 import sys
-import json
-import subprocess
+import re
+import shutil
 import argparse
-import random
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import numba
 import numpy as np
+import orjson
 import librosa
 import soundfile as sf
+import soxr
+from scipy.signal import find_peaks
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadError
+
+from ytdl_common import QuietLogger, log
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -41,6 +50,14 @@ CLIPS_LIST_FILE = BASE_DIR / "rap-clips.txt"
 # Target audio format for ChucK
 SAMPLE_RATE = 44100
 CHANNELS = 1  # mono
+# Onset detection runs on a half-rate copy; clips are still cut at SAMPLE_RATE
+ONSET_SR = 22050
+# Hop (in ONSET_SR samples) of the --fast-onsets time-domain envelope
+FAST_ONSET_HOP = 512
+# Onsets are detected in tiles so analysis can stop once a song's clip quota
+# is filled; each tile sees some padding on both sides for context
+ONSET_TILE = 30.0      # seconds
+ONSET_TILE_PAD = 1.0   # seconds
 
 # Clip parameters
 MIN_CLIP_DURATION = 0.8   # seconds
@@ -49,6 +66,31 @@ DEFAULT_CLIP_DURATION = 1.5  # seconds (fallback when onsets are too far apart)
 MAX_CLIPS_PER_SONG = 40   # limit per song to keep DB manageable
 ONSET_STRENGTH_THRESHOLD = 0.5  # only keep loud enough onsets
 
+# Clip metadata columns, in clip_metadata.json key order
+CLIP_FIELDS = (
+    "clip_file", "artist", "title", "start_time", "end_time",
+    "duration", "rms", "lyric", "song_index", "clip_index",
+)
+
+# Parallel yt-dlp downloads — modest, to stay clear of YouTube rate limits
+DOWNLOAD_WORKERS = 6
+# Parallel chop workers — onset analysis is CPU-bound, so one process per core
+CHOP_WORKERS = os.cpu_count() or 4
+
+
+# Anything that isn't a word character or "-" is dropped from file names
+# (\w matches exactly str.isalnum() plus "_")
+_SANITIZE_RE = re.compile(r"[^\w-]")
+
+
+def _sanitize(s: str) -> str:
+    return _SANITIZE_RE.sub("", s)
+
+
+def _safe_name(index: int, artist: str, title: str) -> str:
+    """File stem of a downloaded song in FULL_SONGS_DIR."""
+    return _sanitize(f"{index:03d}_{artist.replace(' ', '_')}_{title.replace(' ', '_')}")
+
 
 # ──────────────────────────────────────────────────────────────────────────────
 # RAP SONG DATABASE — iconic tracks across many artists
@@ -220,52 +262,66 @@ RAP_SONGS = [
 # STEP 1: Download songs from YouTube
 # ──────────────────────────────────────────────────────────────────────────────
 
+# In-process yt-dlp options (mirrors the old CLI flags). yt-dlp is imported
+# once; each download only builds a YoutubeDL with its own outtmpl.
+_YDL_OPTS = {
+    "js_runtimes": {"node": {}},
+    "remote_components": ["ejs:github"],
+    "format": "bestaudio/best",
+    "postprocessors": [{
+        "key": "FFmpegExtractAudio",
+        "preferredcodec": "wav",
+        "preferredquality": "0",
+    }],
+    "postprocessor_args": {"ffmpeg": ["-ar", str(SAMPLE_RATE), "-ac", str(CHANNELS)]},
+    "noplaylist": True,
+    "socket_timeout": 30,
+    "retries": 3,
+    # HLS/DASH formats are fetched 4 fragments at a time (--concurrent-fragments 4)
+    "concurrent_fragment_downloads": 4,
+    "quiet": True,
+    "no_warnings": True,
+    "noprogress": True,
+    "logger": QuietLogger(),
+}
+
+# aria2c (if installed) opens 16 range connections per file, which gets
+# around YouTube's per-connection throttling; otherwise yt-dlp's native
+# downloader is used
+HAVE_ARIA2C = shutil.which("aria2c") is not None
+if HAVE_ARIA2C:
+    _YDL_OPTS["external_downloader"] = {"default": "aria2c"}
+    _YDL_OPTS["external_downloader_args"] = {"aria2c": ["-x", "16", "-s", "16", "-k", "1M"]}
+
+
 def download_song(artist: str, title: str, url: str, index: int) -> Path | None:
-    """Download a song from YouTube as WAV using yt-dlp + ffmpeg."""
-    safe_name = f"{index:03d}_{artist.replace(' ', '_')}_{title.replace(' ', '_')}"
-    # Remove any problematic characters
-    safe_name = "".join(c for c in safe_name if c.isalnum() or c in "_-")
+    """Download a song from YouTube as WAV using yt-dlp (in-process) + ffmpeg."""
+    safe_name = _safe_name(index, artist, title)
     output_path = FULL_SONGS_DIR / f"{safe_name}.wav"
 
     if output_path.exists():
-        print(f"  [skip] Already downloaded: {output_path.name}")
+        log(f"  [skip] Already downloaded: {output_path.name}")
         return output_path
 
     outtmpl = str(FULL_SONGS_DIR / f"{safe_name}.%(ext)s")
 
-    cmd = [
-        "yt-dlp",
-        "--js-runtimes", "node",
-        "--remote-components", "ejs:github",
-        "-f", "bestaudio/best",
-        "-x",
-        "--audio-format", "wav",
-        "--audio-quality", "0",
-        "--postprocessor-args", f"ffmpeg:-ar {SAMPLE_RATE} -ac {CHANNELS}",
-        "-o", outtmpl,
-        "--no-playlist",
-        "--socket-timeout", "30",
-        "--retries", "3",
-        url,
-    ]
-
-    print(f"  [{index:03d}] Downloading: {artist} — {title}")
+    log(f"  [{index:03d}] Downloading: {artist} — {title}")
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
-        if result.returncode != 0:
-            # Show just the ERROR lines, not warnings
-            error_lines = [l for l in result.stderr.split('\n') if 'ERROR' in l]
-            print(f"  [ERROR] yt-dlp failed (exit={result.returncode}): {' '.join(error_lines)[:300]}")
+        with YoutubeDL({**_YDL_OPTS, "outtmpl": outtmpl}) as ydl:
+            retcode = ydl.download([url])
+        if retcode != 0:
+            log(f"  [ERROR] yt-dlp failed (exit={retcode})")
             return None
-    except subprocess.TimeoutExpired:
-        print(f"  [ERROR] Download timed out")
+    except DownloadError as e:
+        # Show just the error message, not warnings
+        log(f"  [ERROR] yt-dlp failed: {str(e)[:300]}")
         return None
     except Exception as e:
-        print(f"  [ERROR] {e}")
+        log(f"  [ERROR] {e}")
         return None
 
     if output_path.exists():
-        print(f"  [OK] Saved: {output_path.name}")
+        log(f"  [OK] Saved: {output_path.name}")
         return output_path
     else:
         # yt-dlp may have saved with different extension then converted
@@ -273,25 +329,39 @@ def download_song(artist: str, title: str, url: str, index: int) -> Path | None:
         for f in FULL_SONGS_DIR.glob(f"{safe_name}.*"):
             if f.suffix == ".wav":
                 return f
-        print(f"  [WARN] File not found after download: {output_path}")
+        log(f"  [WARN] File not found after download: {output_path}")
         return None
 
 
-def download_all_songs(artists_filter: list[str] | None = None) -> list[tuple[Path, dict]]:
-    """Download all songs, return list of (path, metadata) tuples."""
+def download_all_songs(
+    artists_filter: list[str] | None = None, workers: int = DOWNLOAD_WORKERS,
+) -> list[tuple[Path, dict]]:
+    """
+    Download all songs, return list of (path, metadata) tuples in RAP_SONGS
+    order. Each download mostly waits on sockets and the ffmpeg
+    postprocessor (both release the GIL), so a thread pool overlaps them.
+    """
+    jobs = [
+        (i, artist, title, url, lyrics)
+        for i, (artist, title, url, lyrics) in enumerate(RAP_SONGS)
+        if not artists_filter or any(a.lower() in artist.lower() for a in artists_filter)
+    ]
     results = []
-    for i, (artist, title, url, lyrics) in enumerate(RAP_SONGS):
-        if artists_filter and not any(a.lower() in artist.lower() for a in artists_filter):
-            continue
-        path = download_song(artist, title, url, i)
-        if path and path.exists():
-            results.append((path, {
-                "artist": artist,
-                "title": title,
-                "url": url,
-                "lyrics": lyrics,
-                "index": i,
-            }))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(download_song, artist, title, url, i): (i, artist, title, url, lyrics)
+                   for i, artist, title, url, lyrics in jobs}
+        for future in as_completed(futures):
+            i, artist, title, url, lyrics = futures[future]
+            path = future.result()
+            if path and path.exists():
+                results.append((path, {
+                    "artist": artist,
+                    "title": title,
+                    "url": url,
+                    "lyrics": lyrics,
+                    "index": i,
+                }))
+    results.sort(key=lambda r: r[1]["index"])
     return results
 
 
@@ -299,11 +369,202 @@ def download_all_songs(artists_filter: list[str] | None = None) -> list[tuple[Pa
 # STEP 2: Chop songs into short clips using onset/beat detection
 # ──────────────────────────────────────────────────────────────────────────────
 
-def chop_song(wav_path: Path, metadata: dict, clip_dir: Path) -> list[dict]:
+@numba.njit(cache=True)
+def _select_clips(bounds, cumsq, sr, min_dur, max_dur, default_dur, max_clips, rms_thresh):
+    """
+    Greedy clip selection over sorted boundary times (seconds). `cumsq` is
+    the prefix sum of squares of the analysis signal at `sr`. Returns an
+    (N, 4) array of [start, end, duration, rms] rows, N <= max_clips.
+    """
+    n = len(bounds)
+    last = len(cumsq) - 1
+    out = np.empty((max_clips, 4))
+    count = 0
+    i = 0
+    while i < n - 1 and count < max_clips:
+        start = bounds[i]
+
+        # End boundary: the first one at least default_dur away, else the
+        # last boundary if it is at least min_dur away. searchsorted compares
+        # b >= start + d; the rule is b - start >= d, so nudge j across the
+        # rare float rounding disagreement.
+        j = np.searchsorted(bounds, start + default_dur)
+        while j < n and bounds[j] - start < default_dur:
+            j += 1
+        while j > i + 1 and bounds[j - 1] - start >= default_dur:
+            j -= 1
+        if j < n:
+            end = bounds[j]
+        elif bounds[n - 1] - start >= min_dur:
+            end = bounds[n - 1]
+        else:
+            end = start + default_dur
+
+        dur = end - start
+        if dur < min_dur:
+            i += 1
+            continue
+        if dur > max_dur:
+            end = start + max_dur
+            dur = max_dur
+
+        # Skip near-silent clips (O(1) window RMS from the prefix sum)
+        a = min(int(start * sr), last)
+        b = min(int(end * sr), last)
+        rms = np.sqrt(max(cumsq[b] - cumsq[a], 0.0) / max(1, b - a))
+        if rms < rms_thresh:
+            i += 1
+            continue
+
+        out[count, 0] = start
+        out[count, 1] = end
+        out[count, 2] = dur
+        out[count, 3] = rms
+        count += 1
+
+        # Advance to next non-overlapping boundary (first one >= end)
+        i = max(i + 1, np.searchsorted(bounds, end))
+    return out[:count]
+
+
+def analyze_song(
+    wav_path: Path, snd: sf.SoundFile, fast_onsets: bool = False,
+) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Onset times, the ONSET_SR prefix sum of squares, and the number of seconds
+    the onsets cover. Onsets are detected tile by tile (ONSET_TILE seconds)
+    and detection stops as soon as their clips fill MAX_CLIPS_PER_SONG, so
+    the rest of a long song is never analyzed.
+    Cached next to the WAV (keyed by its mtime and size); a rerun with
+    different clip parameters only analyzes further tiles if it needs them.
+    """
+    st = wav_path.stat()
+    key = np.array([st.st_mtime_ns, st.st_size, ONSET_SR, fast_onsets], dtype=np.int64)
+    cache_path = wav_path.with_suffix(".onsets.npz")
+    onset_times, cumsq, covered = np.empty(0), None, 0.0
+    if cache_path.exists():
+        try:
+            with np.load(cache_path) as cached:
+                if np.array_equal(cached["key"], key):
+                    onset_times, cumsq = cached["onset_times"], cached["cumsq"]
+                    covered = float(cached["covered"])
+        except Exception:
+            onset_times, cumsq, covered = np.empty(0), None, 0.0  # recompute
+
+    if cumsq is not None and (covered >= (len(cumsq) - 1) / ONSET_SR or
+                              _quota_met(_pick_clips(onset_times, cumsq, covered), covered)):
+        return onset_times, cumsq, covered
+
+    y_lo = _analysis_copy(snd)
+    if cumsq is None:
+        # Prefix sum of squares on the analysis copy: RMS of any window is
+        # O(1), so silent candidates are rejected without reading them
+        cumsq = np.concatenate(([0.0], np.cumsum(np.square(y_lo, dtype=np.float64))))
+    duration = len(y_lo) / ONSET_SR
+
+    parts = [onset_times]
+    while covered < duration:
+        tile_end = min(covered + ONSET_TILE, duration)
+        parts.append(_tile_onset_times(y_lo, covered, tile_end, fast_onsets))
+        covered = tile_end
+        onset_times = np.concatenate(parts)
+        if _quota_met(_pick_clips(onset_times, cumsq, covered), covered):
+            break
+
+    np.savez(cache_path, key=key, onset_times=onset_times, cumsq=cumsq, covered=covered)
+    return onset_times, cumsq, covered
+
+
+def _analysis_copy(snd: sf.SoundFile) -> np.ndarray:
+    # Analysis copy at ONSET_SR (half the STFT work), decoded straight with
+    # soundfile + soxr rather than librosa.load's audioread/resample dispatch
+    snd.seek(0)
+    y_lo = snd.read(dtype="float32", always_2d=False)
+    if y_lo.ndim > 1:
+        y_lo = y_lo.mean(axis=1, dtype=np.float32)
+    if snd.samplerate != ONSET_SR:
+        y_lo = soxr.resample(y_lo, snd.samplerate, ONSET_SR, quality="HQ")
+    return y_lo
+
+
+def _fast_onset_times(y: np.ndarray, sr: int) -> np.ndarray:
+    """
+    Time-domain onsets for --fast-onsets: mean |y| per FAST_ONSET_HOP block,
+    half-wave-rectified first difference, then peak picking. No STFT, so it
+    runs at memory speed; good enough for rap's hard kick/snare transients.
+    """
+    n = len(y) // FAST_ONSET_HOP
+    env = np.abs(y[:n * FAST_ONSET_HOP]).reshape(n, FAST_ONSET_HOP).mean(axis=1)
+    rise = np.maximum(np.diff(env), 0.0)
+    if n < 2 or rise.max() <= 0.0:
+        return np.empty(0)
+    peaks, _ = find_peaks(
+        rise,
+        height=ONSET_STRENGTH_THRESHOLD * rise.max(),
+        distance=max(1, int(MIN_CLIP_DURATION * sr / FAST_ONSET_HOP)),
+    )
+    # rise[k] is the jump from block k to k+1; block k's start is the onset
+    # (the same "back up to the quiet frame" spirit as backtrack=True)
+    return peaks * FAST_ONSET_HOP / sr
+
+
+def _tile_onset_times(y_lo: np.ndarray, t0: float, t1: float, fast_onsets: bool) -> np.ndarray:
+    """Onsets in [t0, t1), detected with ONSET_TILE_PAD seconds of context on
+    both sides so the tile edges don't produce spurious or missing onsets."""
+    a = max(0, int((t0 - ONSET_TILE_PAD) * ONSET_SR))
+    b = min(len(y_lo), int((t1 + ONSET_TILE_PAD) * ONSET_SR))
+    seg = y_lo[a:b]
+
+    # Get onset times using onset detection
+    if fast_onsets:
+        times = _fast_onset_times(seg, ONSET_SR)
+    else:
+        onset_env = librosa.onset.onset_strength(y=seg, sr=ONSET_SR)
+        onset_frames = librosa.onset.onset_detect(
+            y=seg, sr=ONSET_SR, onset_envelope=onset_env,
+            backtrack=True, units='frames'
+        )
+        times = librosa.frames_to_time(onset_frames, sr=ONSET_SR)
+    times = times + a / ONSET_SR
+    return times[(times >= t0) & (times < t1)]
+
+
+def _pick_clips(onset_times: np.ndarray, cumsq: np.ndarray, span: float) -> np.ndarray:
+    """Select clips over the first `span` seconds; rows are [start, end, dur, rms]."""
+    # Onsets alone are the boundaries; beat_track would re-run onset strength
+    # plus a DP search just to add backups. If onsets are too sparse to cover
+    # the span, pad with a regular DEFAULT_CLIP_DURATION grid instead.
+    grid = np.empty(0)
+    if len(onset_times) < span / MAX_CLIP_DURATION:
+        grid = np.arange(0, span, DEFAULT_CLIP_DURATION)
+
+    # Merge, sort, deduplicate (np.unique returns a sorted float64 array)
+    bounds = np.unique(np.concatenate(([0.0], onset_times, grid, [span])))
+
+    # Selection is JIT-compiled; only the reads, writes and metadata stay in Python
+    return _select_clips(
+        bounds, cumsq, ONSET_SR,
+        MIN_CLIP_DURATION, MAX_CLIP_DURATION, DEFAULT_CLIP_DURATION,
+        MAX_CLIPS_PER_SONG, 0.01,
+    )
+
+
+def _quota_met(selected: np.ndarray, span: float) -> bool:
+    # Each pick only looks MAX_CLIP_DURATION past its start, so once the quota
+    # is full and the last pick's window ends inside the analyzed span, onsets
+    # after it can no longer change the selection
+    return (len(selected) >= MAX_CLIPS_PER_SONG
+            and selected[-1, 0] + MAX_CLIP_DURATION < span)
+
+
+def chop_song(
+    wav_path: Path, metadata: dict, clip_dir: Path, fast_onsets: bool = False,
+) -> dict[str, np.ndarray]:
     """
     Use librosa onset detection to find natural breakpoints,
     then slice into short clips (MIN_CLIP_DURATION to MAX_CLIP_DURATION seconds).
-    Returns list of clip metadata dicts.
+    Returns the clip metadata as columns (one array per CLIP_FIELDS key),
+    or {} if the song was skipped.
     """
     artist = metadata["artist"]
     title = metadata["title"]
@@ -312,150 +573,126 @@ def chop_song(wav_path: Path, metadata: dict, clip_dir: Path) -> list[dict]:
 
     print(f"  Chopping: {artist} — {title} ({wav_path.name})")
 
+    # The full-rate audio is only ever read clip by clip from this file
     try:
-        y, sr = librosa.load(str(wav_path), sr=SAMPLE_RATE, mono=True)
+        snd = sf.SoundFile(str(wav_path))
     except Exception as e:
         print(f"  [ERROR] Failed to load {wav_path}: {e}")
-        return []
-
-    duration = len(y) / sr
-    if duration < 5.0:
-        print(f"  [SKIP] Too short ({duration:.1f}s)")
-        return []
-
-    # Get onset times using onset detection
-    onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-    onset_frames = librosa.onset.onset_detect(
-        y=y, sr=sr, onset_envelope=onset_env,
-        backtrack=True, units='frames'
-    )
-    onset_times = librosa.frames_to_time(onset_frames, sr=sr)
-
-    # Also get beat times as backup boundaries
-    tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
-    beat_times = librosa.frames_to_time(beat_frames, sr=sr)
-
-    # Merge onsets and beats, sort, deduplicate
-    all_boundaries = sorted(set(
-        [0.0] +
-        list(onset_times) +
-        list(beat_times) +
-        [duration]
-    ))
-
-    # Build clips from consecutive boundary pairs
-    clips_meta = []
-    clip_count = 0
-
-    i = 0
-    while i < len(all_boundaries) - 1 and clip_count < MAX_CLIPS_PER_SONG:
-        start = all_boundaries[i]
-
-        # Find the end boundary that gives us a clip in the right duration range
-        end = start + DEFAULT_CLIP_DURATION
-        for j in range(i + 1, len(all_boundaries)):
-            candidate_end = all_boundaries[j]
-            candidate_dur = candidate_end - start
-            if candidate_dur >= MIN_CLIP_DURATION:
-                end = candidate_end
-                if candidate_dur >= DEFAULT_CLIP_DURATION:
-                    break
-
-        clip_duration = end - start
-        if clip_duration < MIN_CLIP_DURATION:
-            i += 1
-            continue
-        if clip_duration > MAX_CLIP_DURATION:
-            end = start + MAX_CLIP_DURATION
-            clip_duration = MAX_CLIP_DURATION
-
-        # Extract clip samples
-        start_sample = int(start * sr)
-        end_sample = int(end * sr)
-        clip_audio = y[start_sample:end_sample]
-
-        # Check if clip has enough energy (skip silent parts)
-        rms = np.sqrt(np.mean(clip_audio ** 2))
-        if rms < 0.01:
-            # Skip near-silent clips
-            i += 1
-            continue
-
-        # Save clip
-        safe_artist = "".join(c for c in artist if c.isalnum() or c in "_-")
-        safe_title = "".join(c for c in title.replace(" ", "_") if c.isalnum() or c in "_-")
-        clip_name = f"{song_idx:03d}_{safe_artist}_{safe_title}_clip{clip_count:03d}.wav"
-        clip_path = clip_dir / clip_name
-
-        sf.write(str(clip_path), clip_audio, sr)
-
-        # Pick a lyric snippet for display (cycle through available lyrics)
-        lyric = ""
-        if lyrics:
-            lyric = lyrics[clip_count % len(lyrics)]
-
-        clips_meta.append({
-            "clip_file": clip_name,
-            "artist": artist,
-            "title": title,
-            "start_time": round(start, 3),
-            "end_time": round(end, 3),
-            "duration": round(clip_duration, 3),
-            "rms": round(float(rms), 4),
-            "lyric": lyric,
-            "song_index": song_idx,
-            "clip_index": clip_count,
-        })
-
-        clip_count += 1
-
-        # Advance to next non-overlapping boundary
-        next_i = i + 1
-        while next_i < len(all_boundaries) and all_boundaries[next_i] < end:
-            next_i += 1
-        i = next_i
-
+        return {}
+
+    with snd:
+        if snd.frames / snd.samplerate < 5.0:
+            print(f"  [SKIP] Too short ({snd.frames / snd.samplerate:.1f}s)")
+            return {}
+        try:
+            onset_times, cumsq, covered = analyze_song(wav_path, snd, fast_onsets)
+        except Exception as e:
+            print(f"  [ERROR] Failed to load {wav_path}: {e}")
+            return {}
+
+        # Build clips from consecutive boundary pairs over the analyzed span
+        selected = _pick_clips(onset_times, cumsq, covered)
+
+        clip_names = []
+        clip_lyrics = []
+        sr = snd.samplerate
+        safe_artist = _sanitize(artist)
+        safe_title = _sanitize(title.replace(" ", "_"))
+
+        # Clip writes go to a small thread pool so encoding/disk I/O overlaps
+        # with reading the next window (each read returns a fresh array)
+        writes = []
+        with ThreadPoolExecutor(max_workers=4) as writer:
+            for clip_count, (start, end, _, _) in enumerate(selected.tolist()):
+                # Extract clip samples (seek + read just this window at full rate)
+                start_sample = int(start * sr)
+                end_sample = int(end * sr)
+                snd.seek(min(start_sample, snd.frames))
+                clip_audio = snd.read(end_sample - start_sample, dtype="float32", always_2d=False)
+                if clip_audio.ndim > 1:
+                    clip_audio = clip_audio.mean(axis=1)
+                if sr != SAMPLE_RATE:
+                    clip_audio = soxr.resample(clip_audio, sr, SAMPLE_RATE, quality="HQ")
+
+                # Save clip
+                clip_name = f"{song_idx:03d}_{safe_artist}_{safe_title}_clip{clip_count:03d}.wav"
+                clip_path = clip_dir / clip_name
+
+                writes.append(writer.submit(sf.write, str(clip_path), clip_audio, SAMPLE_RATE))
+                clip_names.append(clip_name)
+
+                # Pick a lyric snippet for display (cycle through available lyrics)
+                clip_lyrics.append(lyrics[clip_count % len(lyrics)] if lyrics else "")
+
+    for w in writes:
+        w.result()  # surface any write error, as the inline write used to
+
+    clip_count = len(clip_names)
     print(f"    → {clip_count} clips extracted")
-    return clips_meta
+    return {
+        "clip_file": np.array(clip_names, dtype=str),
+        "artist": np.full(clip_count, artist),
+        "title": np.full(clip_count, title),
+        "start_time": np.round(selected[:, 0], 3),
+        "end_time": np.round(selected[:, 1], 3),
+        "duration": np.round(selected[:, 2], 3),
+        "rms": np.round(selected[:, 3], 4),
+        "lyric": np.array(clip_lyrics, dtype=str),
+        "song_index": np.full(clip_count, song_idx),
+        "clip_index": np.arange(clip_count),
+    }
+
+
+def _chop_task(song: tuple[Path, dict], fast_onsets: bool = False) -> dict[str, np.ndarray]:
+    """Process-pool worker: chop one (wav_path, metadata) song."""
+    wav_path, meta = song
+    return chop_song(wav_path, meta, RAP_CLIPS_DIR, fast_onsets)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # STEP 3: Generate output files for ChucK
 # ──────────────────────────────────────────────────────────────────────────────
 
-def generate_clips_list(all_clips_meta: list[dict], clips_dir: Path, list_file: Path):
+_ORJSON_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _write_lines(path: Path, lines) -> None:
+    """Write pre-formatted lines as one UTF-8 blob (one write, no per-line
+    TextIOWrapper encode)."""
+    path.write_bytes("".join(lines).encode("utf-8"))
+
+
+def generate_clips_list(clips: dict[str, np.ndarray], clips_dir: Path, list_file: Path):
     """Generate rap-clips.txt listing all clip files for mosaic-extract.ck."""
-    with open(list_file, "w") as f:
-        for clip in all_clips_meta:
-            # Use relative path from phase-3-performance directory
-            f.write(f"rap_clips/{clip['clip_file']}\n")
-    print(f"\n[OK] Wrote {len(all_clips_meta)} clip paths to {list_file.name}")
+    names = clips["clip_file"].tolist()
+    # Use relative path from phase-3-performance directory
+    _write_lines(list_file, (f"rap_clips/{name}\n" for name in names))
+    print(f"\n[OK] Wrote {len(names)} clip paths to {list_file.name}")
 
 
-def generate_metadata_json(all_clips_meta: list[dict], meta_file: Path):
+def generate_metadata_json(clips: dict[str, np.ndarray], meta_file: Path):
     """Save full metadata as JSON for ChuGL lyric display + deepfake pipeline."""
-    with open(meta_file, "w") as f:
-        json.dump(all_clips_meta, f, indent=2)
+    # Downstream readers expect one object per clip, so rows are built here
+    rows = [dict(zip(CLIP_FIELDS, row))
+            for row in zip(*(clips[f].tolist() for f in CLIP_FIELDS))]
+    meta_file.write_bytes(orjson.dumps(rows, option=_ORJSON_OPTS))
     print(f"[OK] Wrote metadata to {meta_file.name}")
 
 
-def generate_lyrics_file(all_clips_meta: list[dict], base_dir: Path):
+def generate_lyrics_file(clips: dict[str, np.ndarray], base_dir: Path):
     """
     Generate a simple text file mapping clip index → lyric line
     (for easy reading in ChucK).
     Format: one lyric per line, indexed by clip order.
     """
     lyrics_file = base_dir / "clip_lyrics.txt"
-    with open(lyrics_file, "w") as f:
-        for clip in all_clips_meta:
-            lyric = clip.get("lyric", "")
-            artist = clip.get("artist", "")
-            # Format: "ARTIST: lyric" or just artist name if no lyric
-            if lyric:
-                f.write(f"{artist}: {lyric}\n")
-            else:
-                f.write(f"{artist}\n")
-    print(f"[OK] Wrote {len(all_clips_meta)} lyrics to {lyrics_file.name}")
+    artists = clips["artist"].tolist()
+    # Format: "ARTIST: lyric" or just artist name if no lyric
+    _write_lines(lyrics_file, (
+        f"{artist}: {lyric}\n" if lyric else f"{artist}\n"
+        for artist, lyric in zip(artists, clips["lyric"].tolist())
+    ))
+    print(f"[OK] Wrote {len(artists)} lyrics to {lyrics_file.name}")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -470,6 +707,11 @@ def main():
                         help="Comma-separated artist filter (e.g., 'kendrick,drake')")
     parser.add_argument("--max-songs", type=int, default=None,
                         help="Maximum number of songs to process")
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS,
+                        help=f"Parallel downloads (default {DOWNLOAD_WORKERS})")
+    parser.add_argument("--fast-onsets", action="store_true",
+                        help="Time-domain envelope onsets instead of librosa's "
+                             "spectral flux (much faster, coarser)")
     args = parser.parse_args()
 
     # Ensure directories exist
@@ -484,21 +726,23 @@ def main():
     # Step 1: Download
     if not args.skip_download:
         print("\n" + "=" * 60)
-        print("STEP 1: Downloading rap songs from YouTube")
+        downloader = "aria2c" if HAVE_ARIA2C else "native downloader"
+        print(f"STEP 1: Downloading rap songs from YouTube ({args.workers} workers, {downloader})")
         print("=" * 60)
-        songs = download_all_songs(artists_filter)
+        songs = download_all_songs(artists_filter, args.workers)
         print(f"\nDownloaded {len(songs)} songs successfully")
     else:
         print("\n[skip-download] Using existing files in rap_full_songs/")
         songs = []
+        # One directory read instead of a stat per song
+        with os.scandir(FULL_SONGS_DIR) as it:
+            existing = {e.name for e in it if e.name.endswith(".wav")}
         for i, (artist, title, url, lyrics) in enumerate(RAP_SONGS):
             if artists_filter and not any(a.lower() in artist.lower() for a in artists_filter):
                 continue
-            safe_name = f"{i:03d}_{artist.replace(' ', '_')}_{title.replace(' ', '_')}"
-            safe_name = "".join(c for c in safe_name if c.isalnum() or c in "_-")
-            wav_path = FULL_SONGS_DIR / f"{safe_name}.wav"
-            if wav_path.exists():
-                songs.append((wav_path, {
+            wav_name = f"{_safe_name(i, artist, title)}.wav"
+            if wav_name in existing:
+                songs.append((FULL_SONGS_DIR / wav_name, {
                     "artist": artist, "title": title, "url": url,
                     "lyrics": lyrics, "index": i,
                 }))
@@ -509,35 +753,38 @@ def main():
 
     # Step 2: Chop into clips
     print("\n" + "=" * 60)
-    print("STEP 2: Chopping songs into short clips")
+    print(f"STEP 2: Chopping songs into short clips ({CHOP_WORKERS} processes)")
     print("=" * 60)
-    all_clips_meta = []
-    for wav_path, meta in songs:
-        clips = chop_song(wav_path, meta, RAP_CLIPS_DIR)
-        all_clips_meta.extend(clips)
+    # Songs share no state, so they chop in parallel; map() keeps song order
+    with ProcessPoolExecutor(max_workers=CHOP_WORKERS) as pool:
+        task = functools.partial(_chop_task, fast_onsets=args.fast_onsets)
+        parts = [cols for cols in pool.map(task, songs) if cols]
+    clips = {f: np.concatenate([p[f] for p in parts]) if parts else np.empty(0)
+             for f in CLIP_FIELDS}
+    n_clips = len(clips["clip_file"])
 
-    print(f"\nTotal clips: {len(all_clips_meta)}")
+    print(f"\nTotal clips: {n_clips}")
 
-    # Shuffle clips so KNN gets variety across artists
-    random.seed(42)
-    random.shuffle(all_clips_meta)
+    # Shuffle clips so KNN gets variety across artists (one permutation,
+    # applied to every column)
+    perm = np.random.default_rng(42).permutation(n_clips)
+    clips = {f: col[perm] for f, col in clips.items()}
 
     # Step 3: Generate output files
     print("\n" + "=" * 60)
     print("STEP 3: Generating output files")
     print("=" * 60)
-    generate_clips_list(all_clips_meta, RAP_CLIPS_DIR, CLIPS_LIST_FILE)
-    generate_metadata_json(all_clips_meta, METADATA_FILE)
-    generate_lyrics_file(all_clips_meta, BASE_DIR)
+    generate_clips_list(clips, RAP_CLIPS_DIR, CLIPS_LIST_FILE)
+    generate_metadata_json(clips, METADATA_FILE)
+    generate_lyrics_file(clips, BASE_DIR)
 
     # Summary
     print("\n" + "=" * 60)
     print("DONE! Database ready.")
     print("=" * 60)
-    artists_in_db = set(c["artist"] for c in all_clips_meta)
-    print(f"  Artists: {len(artists_in_db)}")
+    print(f"  Artists: {len(np.unique(clips['artist']))}")
     print(f"  Songs: {len(songs)}")
-    print(f"  Clips: {len(all_clips_meta)}")
+    print(f"  Clips: {n_clips}")
     print(f"  Files:")
     print(f"    {CLIPS_LIST_FILE}  (for mosaic-extract.ck)")
     print(f"    {METADATA_FILE}    (full metadata)")
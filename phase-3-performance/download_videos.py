@@ -4,9 +4,9 @@ download_videos.py — Download podcast + rap music videos for ChuGL playback.
 
 ChuGL's Video class requires MPEG1 video / MP2 audio (.mpg).
 This script:
-  1. Downloads YouTube videos via yt-dlp
-  2. Converts to MPEG1 via ffmpeg
-  3. Trims to relevant segments (saves disk space)
+  1. Resolves YouTube stream URLs via yt-dlp
+  2. Streams them through ffmpeg into MPEG1 (no intermediate file)
+  3. Trims to relevant segments (saves disk space and bandwidth)
 
 Usage:
   uv run python download_videos.py              # download all
@@ -17,8 +17,13 @@ Usage:
 import subprocess
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from yt_dlp import YoutubeDL
+
+from ytdl_common import QuietLogger, log
+
 BASE_DIR = Path(__file__).parent
 PODCAST_VIDEO_DIR = BASE_DIR / "podcast_videos"
 RAP_VIDEO_DIR = BASE_DIR / "rap_videos"
@@ -26,6 +31,9 @@ RAP_VIDEO_DIR = BASE_DIR / "rap_videos"
 # ── Resolution: 480p is enough (we're showing inside a ChuGL window) ──
 VIDEO_RES = "480"
 
+# Parallel downloads — modest, to stay clear of YouTube rate limits
+DOWNLOAD_WORKERS = 4
+
 # ── PODCAST VIDEOS (deepfake-related YouTube videos) ──
 # Each maps to a podcast_*.wav already in our library
 PODCAST_VIDEOS = [
@@ -113,62 +121,99 @@ RAP_VIDEOS = [
 ]
 
 
+# In-process yt-dlp options. Only stream URLs are resolved (no download),
+# so formats that ffmpeg can read directly are preferred — DASH-segment
+# manifests would need yt-dlp's own fragment downloader.
+_YDL_OPTS = {
+    "format": (f"bestvideo[height<={VIDEO_RES}][protocol!*=dash]"
+               f"+bestaudio[protocol!*=dash]/best[height<={VIDEO_RES}]"),
+    "noplaylist": True,
+    # --concurrent-fragments 4, for any format yt-dlp itself has to fetch
+    "concurrent_fragment_downloads": 4,
+    "quiet": True,
+    "no_warnings": True,
+    "logger": QuietLogger(),
+}
+
+
+def _stream_inputs(url: str) -> list[tuple[str, dict]]:
+    """Resolve a YouTube URL to its selected (stream_url, http_headers) pairs."""
+    with YoutubeDL(_YDL_OPTS) as ydl:
+        info = ydl.extract_info(url, download=False)
+    formats = info.get("requested_formats") or [info]
+    return [(f["url"], f.get("http_headers") or {}) for f in formats]
+
+
 def download_and_convert(url: str, output_mpg: Path, trim_start: str = "00:00:00",
                           trim_duration: str = "00:05:00", label: str = ""):
-    """Download a YouTube video via yt-dlp and convert to ChuGL-compatible MPEG1."""
+    """
+    Stream a YouTube video straight into ffmpeg and encode ChuGL-compatible
+    MPEG1 in one pass — no intermediate .mp4 is written or re-read, and
+    ffmpeg seeks with range requests so only the trimmed part is fetched.
+    """
     if output_mpg.exists():
-        print(f"  [skip] {output_mpg.name} already exists")
+        log(f"  [skip] {output_mpg.name} already exists")
         return True
 
-    tmp_mp4 = output_mpg.with_suffix(".tmp.mp4")
-
-    # Step 1: Download via yt-dlp
-    print(f"  ⬇ Downloading: {label or url}")
-    dl_cmd = [
-        "yt-dlp",
-        "-f", f"bestvideo[height<={VIDEO_RES}]+bestaudio/best[height<={VIDEO_RES}]",
-        "--merge-output-format", "mp4",
-        "-o", str(tmp_mp4),
-        "--no-playlist",
-        "--quiet", "--progress",
-        url,
-    ]
-    r = subprocess.run(dl_cmd, capture_output=True, text=True)
-    if r.returncode != 0:
-        print(f"  [ERROR] yt-dlp failed: {r.stderr[:200]}")
+    # Step 1: Resolve stream URLs via yt-dlp
+    log(f"  ⬇ Downloading: {label or url}")
+    try:
+        inputs = _stream_inputs(url)
+    except Exception as e:  # DownloadError, or a format missing its "url"
+        log(f"  [ERROR] yt-dlp failed: {str(e)[:200]}")
         return False
 
-    # Step 2: Convert to MPEG1 + MP2 via ffmpeg (ChuGL requirement)
-    print(f"  🔄 Converting to MPEG1: {output_mpg.name}")
-    ff_cmd = [
-        "ffmpeg", "-y",
-        "-ss", trim_start,
-        "-i", str(tmp_mp4),
+    # Step 2: Fetch + convert to MPEG1 + MP2 via ffmpeg (ChuGL requirement)
+    log(f"  🔄 Converting to MPEG1: {output_mpg.name}")
+    ff_cmd = ["ffmpeg", "-y"]
+    for n, (stream_url, headers) in enumerate(inputs):
+        if headers:
+            ff_cmd += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+        if n == 0:
+            # The first input carries the video: decode H.264 on the GPU/media
+            # engine when one is available (ffmpeg falls back to software)
+            ff_cmd += ["-hwaccel", "auto"]
+        ff_cmd += ["-ss", trim_start, "-i", stream_url]
+    if len(inputs) > 1:
+        ff_cmd += ["-map", "0:v:0", "-map", "1:a:0"]   # separate video + audio streams
+    ff_cmd += [
         "-t", trim_duration,
         "-c:v", "mpeg1video",
         "-q:v", "4",            # quality (lower = better, 2-6 good range)
         "-vf", f"scale={VIDEO_RES}:-2",  # maintain aspect ratio
         "-c:a", "mp2",
         "-b:a", "192k",
+        "-threads", "0",        # mpeg1video has no hw encoder; use every core
         "-f", "mpeg",
         str(output_mpg),
     ]
     r = subprocess.run(ff_cmd, capture_output=True, text=True)
     if r.returncode != 0:
-        print(f"  [ERROR] ffmpeg failed: {r.stderr[:200]}")
+        log(f"  [ERROR] ffmpeg failed: {r.stderr[-200:]}")
+        # Don't leave a partial .mpg behind — the next run would skip it
+        output_mpg.unlink(missing_ok=True)
         return False
 
-    # Clean up temp file
-    tmp_mp4.unlink(missing_ok=True)
-    # Also check for .tmp.mp4.part files
-    for leftover in tmp_mp4.parent.glob(f"{tmp_mp4.stem}*"):
-        leftover.unlink(missing_ok=True)
-
     size_mb = output_mpg.stat().st_size / (1024 * 1024)
-    print(f"  ✅ {output_mpg.name} ({size_mb:.1f} MB)")
+    log(f"  ✅ {output_mpg.name} ({size_mb:.1f} MB)")
     return True
 
 
+def _download_job(job: dict) -> bool:
+    """download_and_convert for one job; any error fails just this video."""
+    try:
+        return download_and_convert(**job)
+    except Exception as e:
+        log(f"  [ERROR] {job.get('label') or job['url']}: {str(e)[:200]}")
+        return False
+
+
+def download_all(jobs: list[dict], workers: int = DOWNLOAD_WORKERS) -> int:
+    """Run download_and_convert over keyword-arg jobs in parallel; returns #ok."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(_download_job, jobs))
+
+
 def main():
     import argparse
     parser = argparse.ArgumentParser()
@@ -185,29 +230,31 @@ def main():
         print("=" * 60)
         print("PODCAST VIDEOS")
         print("=" * 60)
-        for p in PODCAST_VIDEOS:
-            out = PODCAST_VIDEO_DIR / f"{p['id']}.mpg"
-            download_and_convert(
-                p["url"], out,
+        download_all([
+            dict(
+                url=p["url"], output_mpg=PODCAST_VIDEO_DIR / f"{p['id']}.mpg",
                 trim_start=p.get("trim_start", "00:00:00"),
                 trim_duration=p.get("trim_duration", "00:10:00"),
                 label=f"{p['title']}",
             )
-            print()
+            for p in PODCAST_VIDEOS
+        ])
+        print()
 
     if do_all or args.rap:
         print("=" * 60)
         print("RAP MUSIC VIDEOS")
         print("=" * 60)
-        for r in RAP_VIDEOS:
-            out = RAP_VIDEO_DIR / f"{r['id']}.mpg"
-            download_and_convert(
-                r["url"], out,
+        download_all([
+            dict(
+                url=r["url"], output_mpg=RAP_VIDEO_DIR / f"{r['id']}.mpg",
                 trim_start="00:00:00",
                 trim_duration="00:05:00",  # first 5 min of each music video
                 label=r["id"].replace("_", " "),
             )
-            print()
+            for r in RAP_VIDEOS
+        ])
+        print()
 
     print("=" * 60)
     print("DONE!")
@@ -11,14 +11,23 @@ Usage:
   uv run python filter_clean.py
 """
 
-import json
 import re
 from pathlib import Path
 
+import numba
+import numpy as np
+import orjson
+
 BASE_DIR = Path(__file__).parent
 
+
+def _write_lines(path: Path, lines) -> None:
+    """Write pre-formatted lines as one UTF-8 blob (one write, no per-line
+    TextIOWrapper encode)."""
+    path.write_bytes("".join(lines).encode("utf-8"))
+
 # ── Explicit word list ──
-EXPLICIT_WORDS = {
+EXPLICIT_WORDS = frozenset({
     # Slurs & variants
     "nigga", "niggas", "nigger", "niggers", "niggaz",
     # Hard profanity
@@ -35,12 +44,118 @@ EXPLICIT_WORDS = {
     "cocaine", "crack", "molly", "ecstasy", "heroin",
     # Violent
     "kill", "murder", "murdered", "shooting", "shoot",
-}
+})
+
+
+# One alternation, longest words first so "motherfucker" wins over "fucker".
+# search() scans the lyric once in C and stops at the first hit, with no
+# lowercasing, scrubbing or tokenizing.
+_EXPLICIT_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(w) for w in sorted(EXPLICIT_WORDS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
 
 
 def is_explicit(lyric: str) -> bool:
-    words = set(re.sub(r"[^a-zA-Z\s']", "", lyric.lower()).split())
-    return bool(words & EXPLICIT_WORDS)
+    return _EXPLICIT_RE.search(lyric) is not None
+
+
+# ── Batch scanner ──
+# For ASCII text, \bword\b matches exactly when the word is a whole maximal
+# run of [A-Za-z0-9_] (words ending in "'" add nothing: their stems are in
+# the list too). So explicit_mask() tokenizes every ASCII lyric in one
+# JIT-compiled, parallel pass over a single byte buffer and looks each token
+# up by FNV-1a hash; non-ASCII lyrics keep the regex, whose Unicode word
+# and case rules don't map onto bytes.
+
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_FNV_PRIME = np.uint64(0x100000001B3)
+
+
+@numba.njit(cache=True, inline="always")
+def _is_word_byte(c):
+    return (48 <= c <= 57) or (65 <= c <= 90) or (97 <= c <= 122) or c == 95
+
+
+@numba.njit(cache=True, inline="always")
+def _lower_byte(c):
+    return c + 32 if 65 <= c <= 90 else c
+
+
+@numba.njit(cache=True)
+def _fnv1a(buf, a, b):
+    h = _FNV_OFFSET
+    for j in range(a, b):
+        h = (h ^ np.uint64(_lower_byte(buf[j]))) * _FNV_PRIME
+    return h
+
+
+@numba.njit(cache=True, nogil=True, parallel=True)
+def _scan_explicit(buf, starts, ends, word_hashes, word_buf, word_starts, word_ends):
+    n = len(starts)
+    out = np.zeros(n, dtype=np.bool_)
+    for k in numba.prange(n):
+        i = starts[k]
+        end = ends[k]
+        while i < end and not out[k]:
+            while i < end and not _is_word_byte(buf[i]):
+                i += 1
+            j = i
+            h = _FNV_OFFSET
+            while j < end and _is_word_byte(buf[j]):
+                h = (h ^ np.uint64(_lower_byte(buf[j]))) * _FNV_PRIME
+                j += 1
+            if j > i:
+                # word_hashes is sorted; verify bytes on a hash hit
+                w = np.searchsorted(word_hashes, h)
+                while w < len(word_hashes) and word_hashes[w] == h and not out[k]:
+                    a, b = word_starts[w], word_ends[w]
+                    if b - a == j - i:
+                        same = True
+                        for t in range(b - a):
+                            if word_buf[a + t] != _lower_byte(buf[i + t]):
+                                same = False
+                                break
+                        out[k] = same
+                    w += 1
+            i = j
+    return out
+
+
+def _word_table():
+    words = [w.encode("ascii") for w in EXPLICIT_WORDS if "'" not in w]
+    word_buf = np.frombuffer(b"".join(words), dtype=np.uint8)
+    lengths = np.array([len(w) for w in words], dtype=np.int64)
+    word_ends = np.cumsum(lengths)
+    word_starts = word_ends - lengths
+    hashes = np.array([_fnv1a(word_buf, a, b) for a, b in zip(word_starts, word_ends)],
+                      dtype=np.uint64)
+    order = np.argsort(hashes, kind="stable")
+    return hashes[order], word_buf, word_starts[order], word_ends[order]
+
+
+_WORD_TABLE = None
+
+
+def explicit_mask(lyrics: list[str]) -> np.ndarray:
+    """is_explicit() over a whole list of lyrics, as one boolean array."""
+    global _WORD_TABLE
+    if _WORD_TABLE is None:
+        _WORD_TABLE = _word_table()
+    mask = np.zeros(len(lyrics), dtype=bool)
+    ascii_idx = []
+    for i, lyric in enumerate(lyrics):
+        if lyric.isascii():
+            ascii_idx.append(i)
+        else:
+            mask[i] = is_explicit(lyric)
+    if ascii_idx:
+        encoded = [lyrics[i].encode("ascii") for i in ascii_idx]
+        lengths = np.array([len(e) for e in encoded], dtype=np.int64)
+        ends = np.cumsum(lengths)
+        buf = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        mask[ascii_idx] = _scan_explicit(buf, ends - lengths, ends, *_WORD_TABLE)
+    return mask
 
 
 def filter_clips(meta_file: str, list_file: str, clean_list_file: str,
@@ -51,15 +166,31 @@ def filter_clips(meta_file: str, list_file: str, clean_list_file: str,
         print(f"  [SKIP] {meta_file} not found")
         return
 
-    with open(meta_path) as f:
-        clips = json.load(f)
+    clips = orjson.loads(meta_path.read_bytes())
 
-    # Tag each clip
-    for clip in clips:
-        clip["explicit"] = is_explicit(clip.get("lyric", ""))
+    # Determine clip path prefix from first clip
+    file_key = "clip_file" if "clip_file" in clips[0] else "deepfake_file"
+    dir_prefix = prefix
 
-    clean = [c for c in clips if not c["explicit"]]
-    explicit = [c for c in clips if c["explicit"]]
+    # Tag every lyric in one batch scan, then partition in one pass, building
+    # the output lines alongside so the clean lists reuse them
+    is_expl = explicit_mask([c.get("lyric", "") for c in clips]).tolist()
+    list_lines, lyric_lines = [], []
+    clean_list_lines, clean_lyric_lines = [], []
+    clean, explicit = [], []
+    for clip, flag in zip(clips, is_expl):
+        lyric = clip.get("lyric", "")
+        list_line = f"{dir_prefix}/{clip[file_key]}\n"
+        lyric_line = f"{clip.get('artist', '')}: {lyric}\n"
+        list_lines.append(list_line)
+        lyric_lines.append(lyric_line)
+        clip["explicit"] = flag
+        if flag:
+            explicit.append(clip)
+        else:
+            clean.append(clip)
+            clean_list_lines.append(list_line)
+            clean_lyric_lines.append(lyric_line)
 
     print(f"\n{meta_file}: {len(clips)} total → {len(clean)} clean, {len(explicit)} explicit")
 
@@ -73,35 +204,21 @@ def filter_clips(meta_file: str, list_file: str, clean_list_file: str,
         for c in clean[:5]:
             print(f"    ✓ \"{c['lyric'][:70]}\"")
 
-    # Determine clip path prefix from first clip
-    file_key = "clip_file" if "clip_file" in clips[0] else "deepfake_file"
-    dir_prefix = prefix
-
-    # Write ALL list
-    with open(BASE_DIR / list_file, "w") as f:
-        for c in clips:
-            f.write(f"{dir_prefix}/{c[file_key]}\n")
+    # Write ALL list (one write per file)
+    _write_lines(BASE_DIR / list_file, list_lines)
     print(f"  → {list_file}: {len(clips)} clips")
 
     # Write CLEAN list
-    with open(BASE_DIR / clean_list_file, "w") as f:
-        for c in clean:
-            f.write(f"{dir_prefix}/{c[file_key]}\n")
+    _write_lines(BASE_DIR / clean_list_file, clean_list_lines)
     print(f"  → {clean_list_file}: {len(clean)} clips")
 
     # Write lyrics files
-    with open(BASE_DIR / lyrics_file, "w") as f:
-        for c in clips:
-            f.write(f"{c.get('artist', '')}: {c.get('lyric', '')}\n")
-
-    with open(BASE_DIR / clean_lyrics_file, "w") as f:
-        for c in clean:
-            f.write(f"{c.get('artist', '')}: {c.get('lyric', '')}\n")
+    _write_lines(BASE_DIR / lyrics_file, lyric_lines)
+    _write_lines(BASE_DIR / clean_lyrics_file, clean_lyric_lines)
     print(f"  → {clean_lyrics_file}: {len(clean)} lyrics")
 
     # Update metadata with explicit flag
-    with open(meta_path, "w") as f:
-        json.dump(clips, f, indent=2)
+    meta_path.write_bytes(orjson.dumps(clips, option=orjson.OPT_INDENT_2))
     print(f"  → {meta_file} updated (explicit flag added)")
 
     return len(clean), len(explicit)
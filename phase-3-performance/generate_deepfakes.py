@@ -26,17 +26,21 @@ Requires:
 
 import os
 import sys
+import re
+import ssl
 import json
 import asyncio
-import base64
 import time
 import argparse
+from collections import deque
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
 import numpy as np
+import orjson
+import pybase64
 import soundfile as sf
+import soxr
 
 # Load .env
 load_dotenv(Path(__file__).parent.parent / ".env")
@@ -75,55 +79,141 @@ MAX_WORKERS = 8
 # GROK VOICE TTS
 # ──────────────────────────────────────────────────────────────────────────────
 
-async def _tts_one_clip(lyric: str, voice: str, clip_name: str) -> bytes | None:
+_TTS_INSTRUCTIONS = (
+    "You are a rapper performing a verse. "
+    "Rap the given text with energy and flow. "
+    "Do NOT add any words, commentary, or explanation. "
+    "Just perform the exact lyrics given, nothing more."
+)
+
+
+# One TLS context for every connection: building a default context loads the
+# system CA bundle, which websockets would otherwise redo per connect
+_SSL_CTX = ssl.create_default_context()
+
+# Audio delta frames are the bulk of the traffic. They are recognised by their
+# type string and the base64 payload is sliced out with a regex, skipping a
+# full JSON parse of a multi-KB frame. (Base64 can't contain quotes or dots,
+# so the type string can't appear inside the payload.)
+_DELTA_TYPE = '"response.output_audio.delta"'
+_DELTA_RE = re.compile(r'"delta"\s*:\s*"([^"]*)"')
+
+
+class GrokTTSClient:
     """
-    Generate TTS audio for a single lyric using Grok Voice API.
+    One persistent Grok Voice API WebSocket, reused for many lyrics.
 
     Protocol:
-      1. Connect WebSocket to wss://api.x.ai/v1/realtime
-      2. session.update: set voice, output audio format (PCM 24kHz)
+      1. Connect WebSocket to wss://api.x.ai/v1/realtime (once)
+      2. session.update: set voice, output audio format (PCM 24kHz) —
+         only re-sent when the requested voice changes
       3. conversation.item.create: add text message with the lyric
       4. response.create: request audio modality
       5. Collect response.output_audio.delta chunks → PCM bytes
+      6. conversation.item.delete the lyric + reply (server-assigned ids)
+         and wait for each delete to be answered, so earlier lines never
+         become context for later ones and no stray event leaks into the
+         next lyric
+
+    Any error or timeout drops the connection; the next lyric reconnects.
     """
-    import websockets
 
-    headers = {"Authorization": f"Bearer {XAI_API_KEY}"}
-    audio_chunks = []
+    def __init__(self):
+        self.ws = None
+        self.voice = None
 
-    try:
-        async with websockets.connect(
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self.ws is not None:
+            try:
+                await self.ws.close()
+            except Exception:
+                pass
+        self.ws = None
+        self.voice = None
+
+    async def _connect(self):
+        import websockets
+
+        self.ws = await websockets.connect(
             GROK_VOICE_WS_URL,
-            additional_headers=headers,
+            additional_headers={"Authorization": f"Bearer {XAI_API_KEY}"},
+            ssl=_SSL_CTX,
             close_timeout=10,
-        ) as ws:
-            # 1. Configure session
-            await ws.send(json.dumps({
-                "type": "session.update",
-                "session": {
-                    "voice": voice,
-                    "instructions": (
-                        "You are a rapper performing a verse. "
-                        "Rap the given text with energy and flow. "
-                        "Do NOT add any words, commentary, or explanation. "
-                        "Just perform the exact lyrics given, nothing more."
-                    ),
-                    "turn_detection": None,  # manual mode
-                    "audio": {
-                        "output": {
-                            "format": {"type": "audio/pcm", "rate": GROK_SR}
-                        },
+        )
+
+    async def _configure(self, voice: str):
+        await self.ws.send(json.dumps({
+            "type": "session.update",
+            "session": {
+                "voice": voice,
+                "instructions": _TTS_INSTRUCTIONS,
+                "turn_detection": None,  # manual mode
+                "audio": {
+                    "output": {
+                        "format": {"type": "audio/pcm", "rate": GROK_SR}
                     },
-                }
+                },
+            }
+        }))
+
+        # Wait for session.updated
+        while True:
+            msg = orjson.loads(await asyncio.wait_for(self.ws.recv(), timeout=15))
+            if msg.get("type") == "session.updated":
+                break
+        self.voice = voice
+
+    async def _delete_items(self, item_ids: list[str]):
+        """
+        Delete the given conversation items and wait until the server has
+        answered every delete, so neither a confirmation nor a rejection can
+        land in the next lyric's receive loop.
+        """
+        pending = {f"del_{iid}": iid for iid in item_ids}
+        for event_id, iid in pending.items():
+            await self.ws.send(json.dumps({
+                "type": "conversation.item.delete", "event_id": event_id, "item_id": iid,
             }))
 
-            # Wait for session.updated
-            while True:
-                msg = json.loads(await asyncio.wait_for(ws.recv(), timeout=15))
-                if msg.get("type") == "session.updated":
-                    break
-
-            # 2. Send the lyric as a user message
+        try:
+            while pending:
+                msg = orjson.loads(await asyncio.wait_for(self.ws.recv(), timeout=5))
+                msg_type = msg.get("type", "")
+                if msg_type == "conversation.item.deleted":
+                    pending = {e: i for e, i in pending.items() if i != msg.get("item_id")}
+                elif msg_type == "error":
+                    # A rejected delete leaves nothing to clean up; anything
+                    # else means the session is in an unknown state
+                    if msg.get("error", {}).get("event_id") in pending:
+                        pending.pop(msg["error"]["event_id"])
+                    else:
+                        await self.close()
+                        return
+        except asyncio.TimeoutError:
+            await self.close()
+
+    async def synthesize(self, lyric: str, voice: str, clip_name: str) -> bytearray | None:
+        """Generate TTS audio for a single lyric; returns PCM16 bytes or None."""
+        # Deltas are decoded straight onto the end of one growing buffer
+        # (no chunk list + join copy); np.frombuffer reads it in place
+        audio_buf = bytearray()
+        item_id = None   # server-assigned id of the lyric message
+        reply_ids = []
+
+        try:
+            if self.ws is None:
+                await self._connect()
+            if self.voice != voice:
+                await self._configure(voice)
+            ws = self.ws
+
+            # Send the lyric as a user message
             await ws.send(json.dumps({
                 "type": "conversation.item.create",
                 "item": {
@@ -136,7 +226,7 @@ async def _tts_one_clip(lyric: str, voice: str, clip_name: str) -> bytes | None:
                 }
             }))
 
-            # 3. Request audio response
+            # Request audio response
             await ws.send(json.dumps({
                 "type": "response.create",
                 "response": {
@@ -144,97 +234,153 @@ async def _tts_one_clip(lyric: str, voice: str, clip_name: str) -> bytes | None:
                 }
             }))
 
-            # 4. Collect audio delta chunks
+            # Collect audio delta chunks
             while True:
                 try:
-                    msg = json.loads(await asyncio.wait_for(ws.recv(), timeout=30))
+                    frame = await asyncio.wait_for(ws.recv(), timeout=30)
+                    if _DELTA_TYPE in frame:
+                        m = _DELTA_RE.search(frame)
+                        if m:
+                            # JSON may escape "/" as "\/"; real base64 has no "\"
+                            audio_buf += pybase64.b64decode(m.group(1).replace("\\/", "/"), validate=False)
+                            continue
+
+                    msg = orjson.loads(frame)
                     msg_type = msg.get("type", "")
 
-                    if msg_type == "response.output_audio.delta":
+                    if msg_type in ("conversation.item.created", "conversation.item.added"):
+                        item = msg.get("item", {})
+                        if item.get("role") == "user":
+                            item_id = item.get("id")
+
+                    elif msg_type == "response.output_audio.delta":
                         chunk_b64 = msg.get("delta", "")
                         if chunk_b64:
-                            audio_chunks.append(base64.b64decode(chunk_b64))
+                            audio_buf += pybase64.b64decode(chunk_b64, validate=False)
 
                     elif msg_type == "response.done":
+                        reply_ids = [it["id"] for it in msg.get("response", {}).get("output", [])
+                                     if it.get("id")]
                         break
 
                     elif msg_type == "error":
                         print(f"    [ERROR] {clip_name}: {msg.get('error', msg)}")
+                        await self.close()
                         return None
 
                 except asyncio.TimeoutError:
                     print(f"    [TIMEOUT] {clip_name}")
+                    # The response may still be streaming; start clean next time
+                    await self.close()
                     break
 
-    except Exception as e:
-        print(f"    [CONN ERROR] {clip_name}: {e}")
-        return None
+            # Forget this exchange
+            if self.ws is not None:
+                await self._delete_items([iid for iid in [item_id, *reply_ids] if iid])
 
-    if not audio_chunks:
-        return None
+        except Exception as e:
+            print(f"    [CONN ERROR] {clip_name}: {e}")
+            await self.close()
+            return None
+
+        if not audio_buf:
+            return None
 
-    return b"".join(audio_chunks)
+        return audio_buf
 
 
-def generate_deepfake_clip(clip: dict, voice: str) -> dict | None:
+def _deepfake_name(clip: dict, voice: str) -> str:
+    # Name: deepfake_{voice}_{original_name}
+    return f"df_{voice.lower()}_{clip['clip_file']}"
+
+
+def _cached_meta(clip: dict, voice: str) -> dict:
+    """Metadata for a deepfake that is already on disk (no duration probe)."""
+    return {
+        "deepfake_file": _deepfake_name(clip, voice),
+        "original_file": clip["clip_file"],
+        "voice": voice,
+        "lyric": clip["lyric"],
+        "artist": clip["artist"],
+        "title": clip["title"],
+    }
+
+
+async def generate_deepfake_clip(client: GrokTTSClient, clip: dict, voice: str) -> dict | None:
     """
     Generate a single deepfake clip. Returns metadata dict or None on failure.
+    The TTS request runs on the event loop; the resample + WAV write is CPU
+    work, so it is handed to a thread to keep the loop free.
+    Already-generated clips are filtered out in main() before this runs.
     """
-    lyric = clip["lyric"]
-    orig_name = clip["clip_file"]
-    # Name: deepfake_{voice}_{original_name}
-    df_name = f"df_{voice.lower()}_{orig_name}"
-    df_path = DEEPFAKE_DIR / df_name
-
-    # Skip if already generated
-    if df_path.exists():
-        return {
-            "deepfake_file": df_name,
-            "original_file": orig_name,
-            "voice": voice,
-            "lyric": lyric,
-            "artist": clip["artist"],
-            "title": clip["title"],
-        }
-
-    # Run async TTS
-    pcm_bytes = asyncio.run(_tts_one_clip(lyric, voice, df_name))
+    df_name = _deepfake_name(clip, voice)
+    pcm_bytes = await client.synthesize(clip["lyric"], voice, df_name)
     if not pcm_bytes:
         return None
 
-    # Convert PCM16 24kHz → float → resample to 44100 → save WAV
+    return await asyncio.to_thread(_save_deepfake, clip, voice, df_name, pcm_bytes)
+
+
+def _save_deepfake(clip: dict, voice: str, df_name: str, pcm_bytes: bytearray) -> dict:
+    """Resample the Grok PCM to OUTPUT_SR, write the WAV, return its metadata."""
+    df_path = DEEPFAKE_DIR / df_name
+
+    # PCM16 24kHz → resample to 44100 → save WAV, staying int16 throughout:
+    # soxr resamples int16 natively and soundfile writes it as-is, so no
+    # float32 copy of the clip is ever made
     pcm_int16 = np.frombuffer(pcm_bytes, dtype=np.int16)
-    audio_24k = pcm_int16.astype(np.float32) / 32768.0
 
-    # Resample 24kHz → 44100Hz
-    import librosa
-    audio_44k = librosa.resample(audio_24k, orig_sr=GROK_SR, target_sr=OUTPUT_SR)
+    # Resample 24kHz → 44100Hz (soxr directly — the same HQ resampler
+    # librosa.resample wrapped, without importing librosa in every worker)
+    audio_44k = soxr.resample(pcm_int16, GROK_SR, OUTPUT_SR, quality="HQ")
 
     # Save
-    sf.write(str(df_path), audio_44k, OUTPUT_SR)
+    sf.write(str(df_path), audio_44k, OUTPUT_SR, subtype="PCM_16")
 
     return {
         "deepfake_file": df_name,
-        "original_file": orig_name,
+        "original_file": clip["clip_file"],
         "voice": voice,
-        "lyric": lyric,
+        "lyric": clip["lyric"],
         "artist": clip["artist"],
         "title": clip["title"],
         "duration": round(len(audio_44k) / OUTPUT_SR, 3),
     }
 
 
-def _worker(args_tuple):
-    """Thread worker for parallel deepfake generation."""
-    clip, voice = args_tuple
-    try:
-        result = generate_deepfake_clip(clip, voice)
-        if result:
-            print(f"  ✓ [{voice:3s}] {result['deepfake_file']}")
-        return result
-    except Exception as e:
-        print(f"  ✗ [{voice:3s}] {clip['clip_file']}: {e}")
-        return None
+async def _worker(by_voice: dict[str, deque], results: list):
+    """
+    Drain (index, clip) tasks over one persistent TTS connection, staying on
+    the current voice while it has work left so the session is rarely
+    reconfigured, then moving to whichever voice has the most left.
+    """
+    async with GrokTTSClient() as client:
+        while True:
+            voice = client.voice
+            if not by_voice.get(voice):
+                voice = max(by_voice, key=lambda v: len(by_voice[v]), default=None)
+                if voice is None or not by_voice[voice]:
+                    return
+            i, clip = by_voice[voice].popleft()
+            try:
+                result = await generate_deepfake_clip(client, clip, voice)
+                if result:
+                    print(f"  ✓ [{voice:3s}] {result['deepfake_file']}")
+                results[i] = result
+            except Exception as e:
+                print(f"  ✗ [{voice:3s}] {clip['clip_file']}: {e}")
+
+
+async def _run_all(tasks: list[tuple[dict, str]], workers: int) -> list[dict | None]:
+    """Run every (clip, voice) task on one event loop with `workers` connections."""
+    # Work queues per voice (the loop is single-threaded, so plain deques);
+    # results land at each task's original index
+    by_voice = {}
+    for i, (clip, voice) in enumerate(tasks):
+        by_voice.setdefault(voice, deque()).append((i, clip))
+    results = [None] * len(tasks)
+    await asyncio.gather(*(_worker(by_voice, results) for _ in range(min(workers, len(tasks)))))
+    return results
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -246,7 +392,7 @@ def main():
     parser.add_argument("--max-clips", type=int, default=None,
                         help="Limit number of clips to process")
     parser.add_argument("--workers", type=int, default=MAX_WORKERS,
-                        help=f"Parallel workers (default {MAX_WORKERS})")
+                        help=f"Concurrent TTS requests (default {MAX_WORKERS})")
     parser.add_argument("--voices", type=str, default=None,
                         help="Comma-separated voices to use (default: all 5)")
     parser.add_argument("--voice-per-clip", action="store_true",
@@ -262,8 +408,7 @@ def main():
         print(f"ERROR: {METADATA_FILE} not found. Run build_rap_db.py first.")
         sys.exit(1)
 
-    with open(METADATA_FILE) as f:
-        clips = json.load(f)
+    clips = orjson.loads(METADATA_FILE.read_bytes())
 
     print(f"Loaded {len(clips)} clips from {METADATA_FILE.name}")
 
@@ -301,24 +446,33 @@ def main():
             tasks.append((clip, voice))
         print(f"Generating {len(tasks)} deepfake clips (1 voice each, round-robin)")
 
+    # Skip clips already on disk up front (one directory read, then set
+    # lookups) so cached re-runs never reach the TTS workers
+    with os.scandir(DEEPFAKE_DIR) as it:
+        existing = {e.name for e in it}
+    results = [None] * len(tasks)
+    pending = []
+    for i, (clip, voice) in enumerate(tasks):
+        if _deepfake_name(clip, voice) in existing:
+            results[i] = _cached_meta(clip, voice)
+        else:
+            pending.append(i)
+    print(f"Already generated: {len(tasks) - len(pending)}, to generate: {len(pending)}")
+
     # ── PARALLEL GENERATION ──
     print(f"\n{'=' * 60}")
     print(f"Generating deepfakes ({args.workers} parallel workers)")
     print(f"{'=' * 60}")
 
-    all_results = []
-    succeeded = 0
-    failed = 0
-
-    with ThreadPoolExecutor(max_workers=args.workers) as pool:
-        futures = {pool.submit(_worker, t): t for t in tasks}
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                all_results.append(result)
-                succeeded += 1
-            else:
-                failed += 1
+    # One event loop for all tasks (instead of a thread + asyncio.run per
+    # clip); results come back in task order
+    if pending:
+        generated = asyncio.run(_run_all([tasks[i] for i in pending], args.workers))
+        for i, result in zip(pending, generated):
+            results[i] = result
+    all_results = [r for r in results if r]
+    succeeded = len(all_results)
+    failed = len(results) - succeeded
 
     # ── OUTPUT FILES ──
     print(f"\n{'=' * 60}")
@@ -326,14 +480,13 @@ def main():
     print(f"{'=' * 60}")
 
     # deepfake-clips.txt (for ChucK)
-    with open(DEEPFAKE_LIST_FILE, "w") as f:
-        for r in all_results:
-            f.write(f"deepfake_clips/{r['deepfake_file']}\n")
+    # one joined blob, one write (not one f.write per clip)
+    DEEPFAKE_LIST_FILE.write_bytes(
+        "".join(f"deepfake_clips/{r['deepfake_file']}\n" for r in all_results).encode("utf-8"))
     print(f"  → {DEEPFAKE_LIST_FILE.name}: {len(all_results)} clips")
 
     # deepfake_metadata.json
-    with open(DEEPFAKE_METADATA_FILE, "w") as f:
-        json.dump(all_results, f, indent=2)
+    DEEPFAKE_METADATA_FILE.write_bytes(orjson.dumps(all_results, option=orjson.OPT_INDENT_2))
     print(f"  → {DEEPFAKE_METADATA_FILE.name}")
 
     # Voice distribution
@@ -29,17 +29,25 @@ import sys
 import json
 import asyncio
 import base64
+import functools
+import hashlib
 import re
 import argparse
+import contextlib
+import io
 import random
 import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from itertools import chain
 from pathlib import Path
-from difflib import SequenceMatcher
-
 import numpy as np
-import librosa
+import orjson
 import soundfile as sf
+import soxr
 from dotenv import load_dotenv
+from rapidfuzz import fuzz, process
 
 load_dotenv(Path(__file__).parent.parent / ".env")
 
@@ -74,8 +82,21 @@ MAX_CLIPS_PER_SONG = 50
 # Minimum fuzzy-match confidence to accept an alignment
 MIN_CONFIDENCE = 0.30
 
+# JSON files (transcripts/, metadata) go through orjson; OPT_SERIALIZE_NUMPY
+# covers any numpy scalars that slip into timestamps or scores.
+_ORJSON_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _read_json(path: Path):
+    return orjson.loads(path.read_bytes())
+
+
+def _write_json(path: Path, obj) -> None:
+    path.write_bytes(orjson.dumps(obj, option=_ORJSON_OPTS))
+
+
 # Explicit word list (from build_rap_db.py / filter_clean.py)
-EXPLICIT_WORDS = {
+EXPLICIT_WORDS = frozenset({
     "nigga", "niggas", "nigger", "niggers", "niggaz",
     "fuck", "fuckin", "fuckin'", "fucking", "fucked", "fucker", "motherfucker",
     "motherfuckin", "motherfuckin'", "motherfucking", "muthafucka",
@@ -88,81 +109,161 @@ EXPLICIT_WORDS = {
     "whore", "whores",
     "cocaine", "crack", "molly", "ecstasy", "heroin",
     "kill", "murder", "murdered", "shooting", "shoot",
-}
+})
+
+
+# One alternation, longest words first so "motherfucker" wins over "fucker"
+# (same pattern as build_rap_db.py / filter_clean.py)
+_EXPLICIT_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(w) for w in sorted(EXPLICIT_WORDS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
 
 
 def is_explicit(lyric: str) -> bool:
-    words = set(re.sub(r"[^a-zA-Z\s']", "", lyric.lower()).split())
-    return bool(words & EXPLICIT_WORDS)
+    return _EXPLICIT_RE.search(lyric) is not None
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # GROK REALTIME VOICE API — TRANSCRIPTION
 # ─────────────────────────────────────────────────────────────────────────────
 
-async def _grok_transcribe(audio_24k: np.ndarray, seg_id: str) -> str:
+_TRANSCRIBE_INSTRUCTIONS = (
+    "You are a precise audio transcriber for rap music. "
+    "Listen to the audio and transcribe EXACTLY what is being "
+    "rapped or spoken. Output ONLY the raw transcription — "
+    "no commentary, no formatting, no timestamps. "
+    "If the segment is purely instrumental with no vocals, "
+    "output exactly: [INSTRUMENTAL]"
+)
+
+
+class GrokWorker:
     """
-    Send an audio segment to Grok Realtime Voice API and get back a
-    text transcription.
+    One persistent Grok Realtime WebSocket, reused for many segments.
 
     Flow:
       1. WebSocket connect → session.update (enable input_audio_transcription)
+         — once per connection
       2. Stream audio via input_audio_buffer.append
       3. Commit buffer → wait for input_audio_transcription.completed event
       4. Return the transcription from the input event
+      5. conversation.item.delete the audio + reply (server-assigned ids)
+         and wait for each delete to be answered, so earlier segments never
+         become context for later ones and no stray event leaks into the
+         next segment
+
+    Any error or timeout drops the connection; the next segment reconnects.
     """
-    import websockets
 
-    # float32 → PCM16 bytes
-    pcm_int16 = (np.clip(audio_24k, -1.0, 1.0) * 32767).astype(np.int16)
-    pcm_bytes = pcm_int16.tobytes()
+    def __init__(self):
+        self.ws = None
 
-    headers = {"Authorization": f"Bearer {XAI_API_KEY}"}
-    transcript = ""
+    async def __aenter__(self):
+        return self
 
-    try:
-        async with websockets.connect(
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self.ws is not None:
+            try:
+                await self.ws.close()
+            except Exception:
+                pass
+        self.ws = None
+
+    async def _connect(self):
+        import websockets
+
+        self.ws = await websockets.connect(
             GROK_WS_URL,
-            additional_headers=headers,
+            additional_headers={"Authorization": f"Bearer {XAI_API_KEY}"},
             close_timeout=10,
-        ) as ws:
-            # ── 1. Configure session with input_audio_transcription ──
-            await ws.send(json.dumps({
-                "type": "session.update",
-                "session": {
-                    "modalities": ["text"],
-                    "instructions": (
-                        "You are a precise audio transcriber for rap music. "
-                        "Listen to the audio and transcribe EXACTLY what is being "
-                        "rapped or spoken. Output ONLY the raw transcription — "
-                        "no commentary, no formatting, no timestamps. "
-                        "If the segment is purely instrumental with no vocals, "
-                        "output exactly: [INSTRUMENTAL]"
-                    ),
-                    "turn_detection": None,
-                    "input_audio_transcription": {"model": "grok-2-latest"},
-                    "audio": {
-                        "input": {
-                            "format": {"type": "audio/pcm", "rate": GROK_SR}
-                        },
+        )
+
+        # ── 1. Configure session with input_audio_transcription ──
+        await self.ws.send(json.dumps({
+            "type": "session.update",
+            "session": {
+                "modalities": ["text"],
+                "instructions": _TRANSCRIBE_INSTRUCTIONS,
+                "turn_detection": None,
+                "input_audio_transcription": {"model": "grok-2-latest"},
+                "audio": {
+                    "input": {
+                        "format": {"type": "audio/pcm", "rate": GROK_SR}
                     },
-                }
+                },
+            }
+        }))
+
+        # Wait for session.updated
+        while True:
+            msg = orjson.loads(await asyncio.wait_for(self.ws.recv(), timeout=15))
+            if msg.get("type") == "session.updated":
+                break
+
+    async def _delete_items(self, item_ids: list[str], audio_id: str | None) -> str | None:
+        """
+        Delete the given conversation items and wait until the server has
+        answered every delete, so neither a confirmation nor a rejection can
+        land in the next segment's receive loop. Returns the transcript for
+        audio_id if its completed event turns up meanwhile, else None.
+        """
+        pending = {f"del_{iid}": iid for iid in item_ids}
+        for event_id, iid in pending.items():
+            await self.ws.send(json.dumps({
+                "type": "conversation.item.delete", "event_id": event_id, "item_id": iid,
             }))
 
-            # Wait for session.updated
-            while True:
-                msg = json.loads(await asyncio.wait_for(ws.recv(), timeout=15))
-                if msg.get("type") == "session.updated":
-                    break
+        late = None
+        try:
+            while pending:
+                msg = orjson.loads(await asyncio.wait_for(self.ws.recv(), timeout=5))
+                mtype = msg.get("type", "")
+                if mtype == "conversation.item.deleted":
+                    pending = {e: i for e, i in pending.items() if i != msg.get("item_id")}
+                elif mtype == "error":
+                    # A rejected delete leaves nothing to clean up; anything
+                    # else means the session is in an unknown state
+                    if msg.get("error", {}).get("event_id") in pending:
+                        pending.pop(msg["error"]["event_id"])
+                    else:
+                        await self.close()
+                        return late
+                elif (mtype == "conversation.item.input_audio_transcription.completed"
+                      and audio_id is not None and msg.get("item_id") == audio_id):
+                    late = msg.get("transcript", "")
+        except asyncio.TimeoutError:
+            await self.close()
+        return late
+
+    async def transcribe(self, pcm_bytes: bytes, seg_id: str) -> str:
+        """Transcribe one 24 kHz PCM16 segment; returns "" on failure."""
+        # Encode every append message up front, so the send loop below
+        # is pure I/O
+        CHUNK = 48000  # ~1 second of PCM16 at 24 kHz = 48000 bytes
+        append_msgs = [
+            json.dumps({
+                "type": "input_audio_buffer.append",
+                "audio": base64.b64encode(pcm_bytes[i:i + CHUNK]).decode(),
+            })
+            for i in range(0, len(pcm_bytes), CHUNK)
+        ]
+
+        transcript = ""
+        audio_id = None   # server-assigned id of this segment's audio item
+        reply_ids = []
+
+        try:
+            if self.ws is None:
+                await self._connect()
+            ws = self.ws
 
             # ── 2. Stream audio via input_audio_buffer ──
-            CHUNK = 48000  # ~1 second of PCM16 at 24 kHz = 48000 bytes
-            for i in range(0, len(pcm_bytes), CHUNK):
-                chunk = pcm_bytes[i:i + CHUNK]
-                await ws.send(json.dumps({
-                    "type": "input_audio_buffer.append",
-                    "audio": base64.b64encode(chunk).decode(),
-                }))
+            for append_msg in append_msgs:
+                await ws.send(append_msg)
 
             # ── 3. Commit buffer ──
             await ws.send(json.dumps({"type": "input_audio_buffer.commit"}))
@@ -176,68 +277,141 @@ async def _grok_transcribe(audio_24k: np.ndarray, seg_id: str) -> str:
             # ── 5. Collect the input transcription event ──
             while True:
                 try:
-                    msg = json.loads(await asyncio.wait_for(ws.recv(), timeout=12))
+                    msg = orjson.loads(await asyncio.wait_for(ws.recv(), timeout=12))
                     mtype = msg.get("type", "")
 
-                    if mtype == "conversation.item.input_audio_transcription.completed":
-                        transcript = msg.get("transcript", "")
-                        # Don't break yet — wait for response.done to close cleanly
+                    if mtype == "input_audio_buffer.committed":
+                        audio_id = msg.get("item_id")
+                    elif mtype == "conversation.item.input_audio_transcription.completed":
+                        # The connection is shared, so a late event for an
+                        # earlier segment's audio can arrive here; only
+                        # accept the one for this segment's item
+                        if audio_id is not None and msg.get("item_id") == audio_id:
+                            transcript = msg.get("transcript", "")
+                        # Don't break yet — wait for response.done to finish the turn
                     elif mtype == "response.text.delta":
                         # If the model responds in text mode, capture that too
                         if not transcript:
                             transcript += msg.get("delta", "")
                     elif mtype == "response.done":
+                        reply_ids = [it["id"] for it in msg.get("response", {}).get("output", [])
+                                     if it.get("id")]
                         break
                     elif mtype == "error":
                         err = msg.get("error", msg)
                         print(f"    [API ERR] {seg_id}: {err}")
+                        await self.close()
                         return ""
                 except asyncio.TimeoutError:
+                    # The response may still be streaming; start clean next time
+                    await self.close()
                     break
 
-    except Exception as e:
-        print(f"    [CONN ERR] {seg_id}: {e}")
-        return ""
+            # ── 6. Forget this exchange ──
+            if self.ws is not None:
+                ids = [iid for iid in [audio_id, *reply_ids] if iid]
+                late = await self._delete_items(ids, audio_id)
+                if late is not None:
+                    transcript = late
+
+        except Exception as e:
+            print(f"    [CONN ERR] {seg_id}: {e}")
+            await self.close()
+            return ""
 
-    return transcript.strip()
+        return transcript.strip()
 
 
-async def _grok_transcribe_one(audio_44k: np.ndarray, seg_id: str) -> str:
-    """Async: resample 44.1 kHz → 24 kHz, then transcribe (no retries)."""
-    audio_24k = librosa.resample(audio_44k, orig_sr=SAMPLE_RATE, target_sr=GROK_SR)
+async def _grok_transcribe_one(worker: GrokWorker, pcm_bytes: bytes, seg_id: str) -> str:
+    """Async: transcribe a 24 kHz PCM16 segment with a hard timeout (no retries)."""
     try:
-        result = await asyncio.wait_for(_grok_transcribe(audio_24k, seg_id), timeout=15)
+        result = await asyncio.wait_for(worker.transcribe(pcm_bytes, seg_id), timeout=15)
         return result if result is not None else ""
     except asyncio.TimeoutError:
+        # Cancelled mid-exchange; the connection state is unknown
+        await worker.close()
         return ""
     except Exception as e:
         return ""
 
 
+async def _transcribe_worker(queue: deque, segments: list):
+    """Drain windows from `queue` over one persistent Grok connection."""
+    async with GrokWorker() as worker:
+        while queue:
+            w = queue.popleft()
+            text = await _grok_transcribe_one(worker, w["pcm_bytes"], w["seg_id"])
+            segments[w["idx"]] = {"start": w["start"], "end": w["end"], "text": text}
+
+            if text and "[INSTRUMENTAL]" not in text.upper():
+                print(f"✓", end="", flush=True)
+            else:
+                print(f"·", end="", flush=True)
+
+
+async def _transcribe_windows(windows: list[dict]) -> list[dict]:
+    """Transcribe every window on one event loop with PARALLEL_WORKERS connections."""
+    # Shared work queue (the loop is single-threaded, so a plain deque);
+    # results land at each window's original index
+    queue = deque(windows)
+    segments = [None] * len(windows)
+    await asyncio.gather(*(_transcribe_worker(queue, segments)
+                           for _ in range(min(PARALLEL_WORKERS, len(windows)))))
+    return segments
+
+
 # Concurrency for parallel transcription
 PARALLEL_WORKERS = 5
+# Songs processed at once (main); total Grok connections is this × PARALLEL_WORKERS
+SONG_WORKERS = 2
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # TRANSCRIBE A FULL SONG IN SEGMENTS
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _transcript_cache(wav_path: Path) -> Path:
+    """
+    Cache file for a song's Grok transcription, keyed by the SHA-256 of the
+    audio bytes plus the windowing parameters — renames and metadata edits
+    still hit, any change to the audio or the windows misses.
+    """
+    with open(wav_path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()[:16]
+    return (TRANSCRIPTS_DIR /
+            f"grok_align_{digest}_{GROK_SR}_{SEG_DURATION:g}_{SEG_STEP:g}.json")
+
+
 def transcribe_song(wav_path: Path, song_name: str) -> list[dict]:
     """
     Transcribe a full song in overlapping windows using Grok Voice API.
     Sends PARALLEL_WORKERS segments concurrently for speed.
     Returns: [{"start": float, "end": float, "text": str}, ...]
-    Results are cached in transcripts/{song_name}_grok_align.json.
+    Results are cached in transcripts/ by audio content (_transcript_cache);
+    build_rap_db.py's transcripts/{song_name}_grok_align.json is reused if
+    there is no content-keyed entry yet.
     """
-    cache = TRANSCRIPTS_DIR / f"{song_name}_grok_align.json"
-    if cache.exists():
-        print(f"  [cache] {cache.name}")
-        with open(cache) as f:
-            return json.load(f)
-
-    y, sr = librosa.load(str(wav_path), sr=SAMPLE_RATE, mono=True)
+    cache = _transcript_cache(wav_path)
+    for path in (cache, TRANSCRIPTS_DIR / f"{song_name}_grok_align.json"):
+        if path.exists():
+            print(f"  [cache] {path.name}")
+            return _read_json(path)
+
+    # Grok only consumes 24 kHz, so resample the whole song once here rather
+    # than every (50%-overlapping) window separately. soundfile + soxr HQ
+    # directly: the same decode and resampler librosa.load wrapped, without
+    # importing librosa (and numba) at all
+    y, sr = sf.read(str(wav_path), dtype="float32", always_2d=False)
+    if y.ndim > 1:
+        y = y.mean(axis=1)
+    y = soxr.resample(y, sr, GROK_SR, quality="HQ")
+    sr = GROK_SR
     dur = len(y) / sr
 
+    # float32 → PCM16 once for the whole song; overlapping windows would
+    # otherwise convert every sample twice
+    pcm_full = (np.clip(y, -1.0, 1.0) * 32767).astype(np.int16)
+
     # Build all segment windows up front
     windows = []
     t = 0.0
@@ -246,47 +420,24 @@ def transcribe_song(wav_path: Path, song_name: str) -> list[dict]:
         e = min(t + SEG_DURATION, dur)
         s_samp = int(t * sr)
         e_samp = int(e * sr)
-        seg_audio = y[s_samp:e_samp]
         seg_id = f"{song_name}_s{seg_num:03d}"
         windows.append({"start": round(t, 3), "end": round(e, 3),
-                         "audio": seg_audio, "seg_id": seg_id, "idx": seg_num})
+                         "pcm_bytes": pcm_full[s_samp:e_samp].tobytes(),
+                         "seg_id": seg_id, "idx": seg_num})
         seg_num += 1
         t += SEG_STEP
 
     total = len(windows)
     print(f"  ⏳ Transcribing {total} segments ({PARALLEL_WORKERS} parallel)...", flush=True)
 
-    segments = [None] * total
-
-    async def _run_batch(batch):
-        tasks = []
-        for w in batch:
-            tasks.append(_grok_transcribe_one(w["audio"], w["seg_id"]))
-        return await asyncio.gather(*tasks, return_exceptions=True)
-
-    # Process in batches of PARALLEL_WORKERS
-    for batch_start in range(0, total, PARALLEL_WORKERS):
-        batch = windows[batch_start : batch_start + PARALLEL_WORKERS]
-        batch_end = min(batch_start + PARALLEL_WORKERS, total)
-        print(f"    [{batch_start+1}–{batch_end}/{total}] ", end="", flush=True)
-
-        results = asyncio.run(_run_batch(batch))
-
-        for w, result in zip(batch, results):
-            text = result if isinstance(result, str) else ""
-            segments[w["idx"]] = {"start": w["start"], "end": w["end"], "text": text}
-
-            if text and "[INSTRUMENTAL]" not in text.upper():
-                display = text[:50].replace("\n", " ")
-                print(f"✓", end="", flush=True)
-            else:
-                print(f"·", end="", flush=True)
-
-        print(flush=True)
+    # One event loop for the whole song; each worker keeps its connection
+    # open across segments instead of reconnecting per segment
+    print("    ", end="", flush=True)
+    segments = asyncio.run(_transcribe_windows(windows))
+    print(flush=True)
 
     # Cache results
-    with open(cache, "w") as f:
-        json.dump(segments, f, indent=2)
+    _write_json(cache, segments)
     print(f"  Cached → {cache.name}")
 
     return segments
@@ -296,72 +447,187 @@ def transcribe_song(wav_path: Path, song_name: str) -> list[dict]:
 # FUZZY MATCHING — lyrics → segments
 # ─────────────────────────────────────────────────────────────────────────────
 
+class _CleanTable(dict):
+    """
+    str.translate table equivalent to re.sub(r"[^a-z0-9\s']", "", s): keeps
+    ASCII lowercase letters, digits, apostrophes and whitespace, deletes
+    everything else. Filled lazily, so each distinct code point is
+    classified once and later lookups are plain dict hits.
+    """
+
+    _KEEP = frozenset("abcdefghijklmnopqrstuvwxyz0123456789'")
+
+    def __missing__(self, cp: int) -> int | None:
+        ch = chr(cp)
+        self[cp] = cp if ch in self._KEEP or ch.isspace() else None
+        return self[cp]
+
+
+_CLEAN_TABLE = _CleanTable()
+
+
+# Memoized: the same lyric/transcript strings are cleaned over and over
+# across the phrase × segment matching loops.
+@functools.lru_cache(maxsize=4096)
 def _clean(s: str) -> str:
     """Lowercase, strip punctuation, normalize whitespace."""
-    return re.sub(r"[^a-z0-9\s']", "", s.lower()).strip()
+    return s.lower().translate(_CLEAN_TABLE).strip()
+
 
+@functools.lru_cache(maxsize=4096)
+def _words(s: str) -> tuple[str, ...]:
+    # tuple, not list — cached results are shared between callers
+    return tuple(_clean(s).split())
 
-def _words(s: str) -> list[str]:
-    return _clean(s).split()
+
+def _prepare_segments(segments: list[dict]) -> None:
+    """
+    Attach cleaned text ("_ct"), word tuple ("_tw") and word set ("_tset")
+    to each segment in place, so matching doesn't re-tokenize every segment
+    for every phrase. Called after transcribe_song has written its cache,
+    so the extra keys never reach disk.
+    """
+    for seg in segments:
+        text = seg.get("text", "")
+        seg["_ct"] = _clean(text)
+        seg["_tw"] = _words(text)
+        seg["_tset"] = frozenset(seg["_tw"])
+
+
+def _window_match_counts(lw: tuple[str, ...], tw: tuple[str, ...], cutoff: float) -> np.ndarray:
+    """
+    Sliding-window word match: entry i counts the positions j where lw[j]
+    fuzzy-matches tw[i + j] (fuzz.ratio > cutoff). The word×word match map
+    is filled by a single cdist call, and every window's diagonal sum is
+    gathered with one fancy-index instead of a Python loop of np.trace.
+    """
+    hits = process.cdist(lw, tw, scorer=fuzz.ratio, score_cutoff=cutoff) > cutoff
+    n_lw, n_tw = hits.shape
+    n_pos = max(1, n_tw - n_lw + 1)
+    # Zero-pad on the right so a lyric longer than the transcript still
+    # indexes in bounds (those positions simply count as misses)
+    padded = np.zeros((n_lw, n_pos + n_lw - 1), dtype=bool)
+    padded[:, :n_tw] = hits
+    cols = np.arange(n_pos)[:, None] + np.arange(n_lw)
+    return padded[np.arange(n_lw), cols].sum(axis=1)
 
 
 def match_lyric_to_segments(
-    lyric: str, segments: list[dict]
+    lyric: str, segments: list[dict], seq_scores: np.ndarray | None = None,
+    overlap_scores: np.ndarray | None = None, near: float | None = None,
 ) -> tuple[dict | None, float]:
     """
     Find the segment whose Grok transcription best matches `lyric`.
     Uses three strategies and takes the max score:
       1. Word set overlap
       2. Consecutive-word sliding window (tolerates transcription errors)
-      3. SequenceMatcher on cleaned strings
+      3. Fuzzy ratio on cleaned strings
+    seq_scores, if given, holds the precomputed strategy-3 score (0–1) of
+    this lyric against each segment — one row of the matrix from
+    _seq_score_matrix — so strategy 3 is a lookup instead of a call.
+    overlap_scores likewise holds a row of _overlap_matrix for strategy 1.
+    near, if given, is the phrase's old timestamp (seconds): segments are
+    visited closest-first, and the scan stops at the first near-certain
+    match (> 0.9), which is usually found within the first few.
+    Segments run through _prepare_segments() are not re-tokenized.
     Returns (best_segment, confidence).
     """
     lw = _words(lyric)
     if not lw:
         return None, 0.0
+    lyric_clean = _clean(lyric)
+    lset = set(lw)
 
     best_seg = None
     best_score = 0.0
 
-    for seg in segments:
+    order = range(len(segments))
+    if near is not None:
+        order = sorted(order, key=lambda i: abs(
+            (segments[i]["start"] + segments[i]["end"]) / 2 - near))
+
+    for si in order:
+        seg = segments[si]
         text = seg.get("text", "")
         if not text or "[INSTRUMENTAL]" in text.upper():
             continue
 
-        tw = _words(text)
+        tw = seg["_tw"] if "_tw" in seg else _words(text)
         if not tw:
             continue
 
         # ── Strategy 1: word-set overlap ──
-        lset = set(lw)
-        tset = set(tw)
-        overlap = len(lset & tset) / len(lset) if lset else 0
+        if overlap_scores is not None:
+            overlap = float(overlap_scores[si])
+        else:
+            tset = seg["_tset"] if "_tset" in seg else tw
+            overlap = len(lset.intersection(tset)) / len(lset)
 
         # ── Strategy 2: consecutive-word sliding window ──
         consec = 0.0
         if len(lw) >= 2:
-            for i in range(max(1, len(tw) - len(lw) + 1)):
-                window = tw[i : i + len(lw)]
-                matches = sum(
-                    1
-                    for a, b in zip(lw, window)
-                    if a == b
-                    or SequenceMatcher(None, a, b).ratio() > 0.75
-                )
-                consec = max(consec, matches / len(lw))
-
-        # ── Strategy 3: SequenceMatcher on full cleaned strings ──
-        seq = SequenceMatcher(None, _clean(lyric), _clean(text)).ratio()
+            consec = _window_match_counts(lw, tw, 75).max() / len(lw)
+
+        # ── Strategy 3: fuzzy ratio on full cleaned strings ──
+        if seq_scores is not None:
+            seq = float(seq_scores[si])
+        else:
+            seq = fuzz.ratio(lyric_clean, seg["_ct"] if "_ct" in seg else _clean(text)) / 100.0
 
         score = max(overlap * 0.85, consec * 0.95, seq)
 
         if score > best_score:
             best_score = score
             best_seg = seg
+            if best_score > 0.9:
+                break  # near-certain match, stop scanning
 
     return best_seg, best_score
 
 
+def _seq_score_matrix(lyrics: list[str], segments: list[dict]) -> np.ndarray:
+    """
+    Strategy-3 scores (0–1) for every (lyric, segment) pair in one
+    multithreaded C++ call instead of one fuzz.ratio per pair in Python.
+    Rows follow `lyrics`, columns follow `segments`.
+    """
+    return process.cdist(
+        [_clean(t) for t in lyrics],
+        [s["_ct"] if "_ct" in s else _clean(s.get("text", "")) for s in segments],
+        scorer=fuzz.ratio, workers=-1, dtype=np.float32,
+    ) / 100.0
+
+
+def _overlap_matrix(lyrics: list[str], segments: list[dict]) -> np.ndarray:
+    """
+    Strategy-1 scores (fraction of each lyric's distinct words found in the
+    segment) for every (lyric, segment) pair. Both sides are encoded as
+    word-presence rows over a shared vocabulary, so all P×S set
+    intersections become a single matrix product.
+    Rows follow `lyrics`, columns follow `segments`.
+    """
+    lsets = [set(_words(t)) for t in lyrics]
+    ssets = [s["_tset"] if "_tset" in s else set(_words(s.get("text", "")))
+             for s in segments]
+
+    vocab = {}
+    for ws in lsets:
+        for w in ws:
+            vocab.setdefault(w, len(vocab))
+
+    def _encode(sets):
+        m = np.zeros((len(sets), len(vocab)), dtype=np.float32)
+        for i, ws in enumerate(sets):
+            m[i, [vocab[w] for w in ws if w in vocab]] = 1.0
+        return m
+
+    # Segment words outside the lyric vocabulary can never overlap, so the
+    # vocabulary only needs the lyrics' words
+    hits = _encode(lsets) @ _encode(ssets).T
+    sizes = np.array([max(1, len(ws)) for ws in lsets], dtype=np.float32)
+    return hits / sizes[:, None]
+
+
 def refine_timestamp(
     lyric: str, seg: dict, song_duration: float
 ) -> tuple[float, float]:
@@ -375,25 +641,13 @@ def refine_timestamp(
     seg_dur = seg_end - seg_start
 
     lw = _words(lyric)
-    tw = _words(text)
+    tw = seg["_tw"] if "_tw" in seg else _words(text)
 
     if not tw or not lw:
         return seg_start, min(seg_end, seg_start + MAX_PHRASE_DURATION)
 
     # Find best match position within transcript word list
-    best_pos = 0
-    best_r = 0.0
-    for i in range(max(1, len(tw) - len(lw) + 1)):
-        window = tw[i : i + len(lw)]
-        m = sum(
-            1
-            for a, b in zip(lw, window)
-            if a == b or SequenceMatcher(None, a, b).ratio() > 0.7
-        )
-        r = m / len(lw)
-        if r > best_r:
-            best_r = r
-            best_pos = i
+    best_pos = int(np.argmax(_window_match_counts(lw, tw, 70)))
 
     # Estimate timing: proportional to word position in transcript
     words_per_sec = len(tw) / seg_dur if seg_dur > 0 else 5.0
@@ -423,44 +677,60 @@ def rechop_song(
     Re-chop audio clips at corrected timestamps.
     Clip naming uses the same scheme as build_rap_db.py so that deepfake
     clip references remain valid.
+    Only the phrase windows are read from disk (seek + read), never the
+    whole song. Clip writes go to a small thread pool so encoding/disk I/O
+    overlaps with reading the next window.
     """
-    y, sr = librosa.load(str(wav_path), sr=SAMPLE_RATE, mono=True)
-    dur = len(y) / sr
-
     safe_a = "".join(c for c in artist if c.isalnum() or c in "_-")
     safe_t = "".join(c for c in title.replace(" ", "_") if c.isalnum() or c in "_-")
 
     clips = []
-    for ci, ph in enumerate(phrases[:MAX_CLIPS_PER_SONG]):
-        s = max(0, ph["start"] - 0.05)  # 50 ms padding
-        e = min(dur, ph["end"] + 0.05)
+    writes = []
+    with sf.SoundFile(str(wav_path)) as snd, ThreadPoolExecutor(max_workers=4) as writer:
+        sr = snd.samplerate
+        dur = snd.frames / sr
 
-        pdur = e - s
-        if pdur < MIN_PHRASE_DURATION or pdur > MAX_PHRASE_DURATION + 1.0:
-            continue
+        for ci, ph in enumerate(phrases[:MAX_CLIPS_PER_SONG]):
+            s = max(0, ph["start"] - 0.05)  # 50 ms padding
+            e = min(dur, ph["end"] + 0.05)
 
-        clip = y[int(s * sr) : int(e * sr)]
-        rms = float(np.sqrt(np.mean(clip**2)))
-        if rms < 0.005:
-            continue
+            pdur = e - s
+            if pdur < MIN_PHRASE_DURATION or pdur > MAX_PHRASE_DURATION + 1.0:
+                continue
 
-        name = f"{song_idx:03d}_{safe_a}_{safe_t}_p{ci:03d}.wav"
-        sf.write(str(RAP_CLIPS_DIR / name), clip, sr)
+            s_samp = int(s * sr)
+            snd.seek(s_samp)
+            # int16 end to end: WAV PCM16 in, PCM16 out, no float32 copy
+            clip = snd.read(int(e * sr) - s_samp, dtype="int16", always_2d=False)
+            if clip.ndim > 1:
+                clip = clip.mean(axis=1, dtype=np.int32).astype(np.int16)
 
-        clips.append({
-            "clip_file": name,
-            "artist": artist,
-            "title": title,
-            "lyric": ph["lyric"],
-            "start_time": round(ph["start"], 3),
-            "end_time": round(ph["end"], 3),
-            "duration": round(pdur, 3),
-            "rms": round(rms, 4),
-            "song_index": song_idx,
-            "clip_index": ci,
-            "alignment_confidence": ph.get("confidence", 0),
-        })
+            # int32 squares can't overflow (32768² < 2³¹); mean accumulates in float64
+            rms = float(np.sqrt(np.square(clip, dtype=np.int32).mean())) / 32768 if clip.size else 0.0
+            if rms < 0.005:
+                continue
 
+            name = f"{song_idx:03d}_{safe_a}_{safe_t}_p{ci:03d}.wav"
+            writes.append(writer.submit(
+                sf.write, str(RAP_CLIPS_DIR / name), clip, sr, subtype="PCM_16",
+            ))
+
+            clips.append({
+                "clip_file": name,
+                "artist": artist,
+                "title": title,
+                "lyric": ph["lyric"],
+                "start_time": round(ph["start"], 3),
+                "end_time": round(ph["end"], 3),
+                "duration": round(pdur, 3),
+                "rms": round(rms, 4),
+                "song_index": song_idx,
+                "clip_index": ci,
+                "alignment_confidence": ph.get("confidence", 0),
+            })
+
+    for w in writes:
+        w.result()  # surface any write error, as the inline write used to
     return clips
 
 
@@ -468,6 +738,12 @@ def rechop_song(
 # OUTPUT GENERATION (same format as build_rap_db.py / filter_clean.py)
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _write_lines(path: Path, lines) -> None:
+    """Write pre-formatted lines as one UTF-8 blob (one write, no per-line
+    TextIOWrapper encode)."""
+    path.write_bytes("".join(lines).encode("utf-8"))
+
+
 def generate_outputs(all_clips: list[dict]):
     """Regenerate clip_metadata.json, clip_lyrics.txt, rap-clips.txt, etc."""
     for clip in all_clips:
@@ -476,35 +752,161 @@ def generate_outputs(all_clips: list[dict]):
     clean = [c for c in all_clips if not c["explicit"]]
 
     # ── clip_metadata.json ──
-    with open(METADATA_FILE, "w") as f:
-        json.dump(all_clips, f, indent=2)
+    _write_json(METADATA_FILE, all_clips)
     print(f"  → {METADATA_FILE.name}: {len(all_clips)} clips")
 
     # ── rap-clips.txt (all) ──
-    with open(CLIPS_LIST_FILE, "w") as f:
-        for c in all_clips:
-            f.write(f"rap_clips/{c['clip_file']}\n")
+    _write_lines(CLIPS_LIST_FILE, [f"rap_clips/{c['clip_file']}\n" for c in all_clips])
     print(f"  → {CLIPS_LIST_FILE.name}: {len(all_clips)} clips")
 
     # ── rap-clips-clean.txt ──
-    with open(BASE_DIR / "rap-clips-clean.txt", "w") as f:
-        for c in clean:
-            f.write(f"rap_clips/{c['clip_file']}\n")
+    _write_lines(BASE_DIR / "rap-clips-clean.txt", [f"rap_clips/{c['clip_file']}\n" for c in clean])
     print(f"  → rap-clips-clean.txt: {len(clean)} clips")
 
     # ── clip_lyrics.txt (all) ──
-    with open(LYRICS_FILE, "w") as f:
-        for c in all_clips:
-            f.write(f"{c['artist']}: {c['lyric']}\n")
+    _write_lines(LYRICS_FILE, [f"{c['artist']}: {c['lyric']}\n" for c in all_clips])
     print(f"  → {LYRICS_FILE.name}")
 
     # ── clip_lyrics_clean.txt ──
-    with open(BASE_DIR / "clip_lyrics_clean.txt", "w") as f:
-        for c in clean:
-            f.write(f"{c['artist']}: {c['lyric']}\n")
+    _write_lines(BASE_DIR / "clip_lyrics_clean.txt", [f"{c['artist']}: {c['lyric']}\n" for c in clean])
     print(f"  → clip_lyrics_clean.txt")
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# PER-SONG PIPELINE
+# ─────────────────────────────────────────────────────────────────────────────
+
+def process_song(
+    song: dict, si: int, total: int, min_confidence: float, dry_run: bool,
+) -> tuple[list[dict], dict]:
+    """
+    Transcribe, match, and (unless dry_run) re-chop one song.
+    Returns (clips, stats) — stats counts matched / unmatched / kept_old
+    phrases. Songs are independent, so main() runs these in a process pool.
+    """
+    stats = {"matched": 0, "unmatched": 0, "kept_old": 0}
+
+    print("=" * 60)
+    print(f"[{si + 1}/{total}] {song['artist']} — {song['title']}")
+    print("=" * 60)
+    print(f"  Phrases to align: {len(song['phrases'])}")
+
+    # Step 1: Transcribe song segments with Grok Voice API
+    segments = transcribe_song(song["wav"], song["name"])
+    vocal_segs = [
+        s for s in segments
+        if s.get("text") and "[INSTRUMENTAL]" not in s["text"].upper()
+    ]
+    print(f"  Segments: {len(segments)} total, {len(vocal_segs)} with vocals\n")
+
+    if not vocal_segs:
+        print("  [WARN] No vocal segments found — keeping old timestamps")
+        stats["kept_old"] += len(song["phrases"])
+        if dry_run:
+            return [], stats
+        clips = rechop_song(
+            song["wav"], song["phrases"],
+            song["artist"], song["title"], song["song_idx"],
+        )
+        return clips, stats
+
+    # Get song duration for timestamp clamping
+    info = sf.info(str(song["wav"]))
+    song_dur = info.duration
+
+    # Step 2: Match each phrase to a segment
+    _prepare_segments(segments)
+    lyrics = [ph["lyric"] for ph in song["phrases"]]
+    seq_matrix = _seq_score_matrix(lyrics, segments)
+    overlap_matrix = _overlap_matrix(lyrics, segments)
+    corrected_phrases = []
+    for ph, seq_scores, overlap_scores in zip(
+        song["phrases"], seq_matrix, overlap_matrix
+    ):
+        old_start = ph.get("start", 0)
+        old_end = ph.get("end", 0)
+
+        best_seg, confidence = match_lyric_to_segments(
+            ph["lyric"], segments, seq_scores, overlap_scores,
+            near=(old_start + old_end) / 2,
+        )
+
+        if best_seg and confidence >= min_confidence:
+            new_start, new_end = refine_timestamp(
+                ph["lyric"], best_seg, song_dur
+            )
+            moved = abs(new_start - old_start)
+
+            corrected_phrases.append({
+                "lyric": ph["lyric"],
+                "start": new_start,
+                "end": new_end,
+                "line_index": ph.get("line_index", 0),
+                "confidence": round(confidence, 3),
+            })
+            stats["matched"] += 1
+
+            marker = "✓" if moved > 2.0 else "·"
+            print(
+                f"  {marker} [{confidence:.2f}] "
+                f'"{ph["lyric"][:55]}"  '
+                f"{old_start:.1f}→{new_start:.1f}s"
+                + (f"  (moved {moved:.1f}s)" if moved > 2.0 else "")
+            )
+        else:
+            # Keep old timestamp — better than nothing
+            corrected_phrases.append({
+                "lyric": ph["lyric"],
+                "start": old_start,
+                "end": old_end,
+                "line_index": ph.get("line_index", 0),
+                "confidence": round(confidence, 3),
+            })
+            stats["unmatched"] += 1
+            print(
+                f"  ✗ [{confidence:.2f}] "
+                f'"{ph["lyric"][:55]}"  (kept old: {old_start:.1f}s)'
+            )
+
+    print(f"\n  Aligned: {sum(1 for p in corrected_phrases if p['confidence'] >= min_confidence)}"
+          f"/{len(song['phrases'])} phrases")
+
+    if dry_run:
+        return [], stats
+
+    # Step 3: Save corrected phrases
+    phrases_file = TRANSCRIPTS_DIR / f"{song['name']}_phrases.json"
+    _write_json(phrases_file, corrected_phrases)
+    print(f"  → Updated {phrases_file.name}")
+
+    # Step 4: Re-chop audio clips
+    clips = rechop_song(
+        song["wav"], corrected_phrases,
+        song["artist"], song["title"], song["song_idx"],
+    )
+    print(f"  → Re-chopped {len(clips)} clips")
+    return clips, stats
+
+
+def _process_song_task(args_tuple, capture: bool) -> tuple[list[dict] | None, dict | None, str]:
+    """
+    Process-pool worker: run process_song, returning (clips, stats, log).
+    With capture, the song's output is buffered and returned as `log`, so
+    each song prints as one block instead of interleaving with other songs;
+    without it (a single worker) output, including transcription progress,
+    streams live. On failure clips and stats are None and the log ends with
+    the traceback, so whatever the song printed before failing is kept.
+    """
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf) if capture else contextlib.nullcontext():
+        try:
+            clips, stats = process_song(*args_tuple)
+        except Exception:
+            print(f"  [ERROR]\n{traceback.format_exc()}", end="")
+            clips, stats = None, None
+    return clips, stats, buf.getvalue()
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # MAIN
 # ─────────────────────────────────────────────────────────────────────────────
@@ -527,6 +929,9 @@ def main():
                         help=f"Min fuzzy-match confidence (default {MIN_CONFIDENCE})")
     parser.add_argument("--force", action="store_true",
                         help="Delete Grok transcription cache and re-transcribe")
+    parser.add_argument("--workers", type=int, default=SONG_WORKERS,
+                        help=f"Songs processed in parallel, each with up to "
+                             f"{PARALLEL_WORKERS} Grok connections (default {SONG_WORKERS})")
     args = parser.parse_args()
 
     if not XAI_API_KEY:
@@ -545,10 +950,8 @@ def main():
         if not lyrics_file.exists() or not wav_file.exists():
             continue
 
-        with open(lyrics_file) as f:
-            lyrics_data = json.load(f)
-        with open(pf) as f:
-            phrases = json.load(f)
+        lyrics_data = _read_json(lyrics_file)
+        phrases = _read_json(pf)
 
         artist = lyrics_data.get("artist", "")
         title = lyrics_data.get("title", "")
@@ -586,109 +989,43 @@ def main():
     # ── Delete transcription cache if --force ──
     if args.force:
         for s in songs:
-            cache = TRANSCRIPTS_DIR / f"{s['name']}_grok_align.json"
-            if cache.exists():
-                cache.unlink()
-                print(f"  [deleted cache] {cache.name}")
+            for cache in (_transcript_cache(s["wav"]),
+                          TRANSCRIPTS_DIR / f"{s['name']}_grok_align.json"):
+                if cache.exists():
+                    cache.unlink()
+                    print(f"  [deleted cache] {cache.name}")
         print()
 
-    # ── Process each song ──
-    all_clips = []
+    # ── Process songs in parallel ──
+    # Results land in per-song slots, so the clip order before the seeded
+    # shuffle is the song order, not completion order
+    per_song_clips = [None] * len(songs)
     stats = {"matched": 0, "unmatched": 0, "kept_old": 0}
 
-    for si, song in enumerate(songs):
-        print("=" * 60)
-        print(f"[{si + 1}/{len(songs)}] {song['artist']} — {song['title']}")
-        print("=" * 60)
-        print(f"  Phrases to align: {len(song['phrases'])}")
-
-        # Step 1: Transcribe song segments with Grok Voice API
-        segments = transcribe_song(song["wav"], song["name"])
-        vocal_segs = [
-            s for s in segments
-            if s.get("text") and "[INSTRUMENTAL]" not in s["text"].upper()
-        ]
-        print(f"  Segments: {len(segments)} total, {len(vocal_segs)} with vocals\n")
-
-        if not vocal_segs:
-            print("  [WARN] No vocal segments found — keeping old timestamps")
-            stats["kept_old"] += len(song["phrases"])
-            if not args.dry_run:
-                clips = rechop_song(
-                    song["wav"], song["phrases"],
-                    song["artist"], song["title"], song["song_idx"],
-                )
-                all_clips.extend(clips)
-            continue
-
-        # Get song duration for timestamp clamping
-        info = sf.info(str(song["wav"]))
-        song_dur = info.duration
-
-        # Step 2: Match each phrase to a segment
-        corrected_phrases = []
-        for ph in song["phrases"]:
-            best_seg, confidence = match_lyric_to_segments(ph["lyric"], segments)
-
-            old_start = ph.get("start", 0)
-            old_end = ph.get("end", 0)
-
-            if best_seg and confidence >= args.min_confidence:
-                new_start, new_end = refine_timestamp(
-                    ph["lyric"], best_seg, song_dur
-                )
-                moved = abs(new_start - old_start)
-
-                corrected_phrases.append({
-                    "lyric": ph["lyric"],
-                    "start": new_start,
-                    "end": new_end,
-                    "line_index": ph.get("line_index", 0),
-                    "confidence": round(confidence, 3),
-                })
-                stats["matched"] += 1
-
-                marker = "✓" if moved > 2.0 else "·"
-                print(
-                    f"  {marker} [{confidence:.2f}] "
-                    f'"{ph["lyric"][:55]}"  '
-                    f"{old_start:.1f}→{new_start:.1f}s"
-                    + (f"  (moved {moved:.1f}s)" if moved > 2.0 else "")
-                )
-            else:
-                # Keep old timestamp — better than nothing
-                corrected_phrases.append({
-                    "lyric": ph["lyric"],
-                    "start": old_start,
-                    "end": old_end,
-                    "line_index": ph.get("line_index", 0),
-                    "confidence": round(confidence, 3),
-                })
-                stats["unmatched"] += 1
-                print(
-                    f"  ✗ [{confidence:.2f}] "
-                    f'"{ph["lyric"][:55]}"  (kept old: {old_start:.1f}s)'
-                )
-
-        print(f"\n  Aligned: {sum(1 for p in corrected_phrases if p['confidence'] >= args.min_confidence)}"
-              f"/{len(song['phrases'])} phrases")
-
-        if args.dry_run:
-            continue
-
-        # Step 3: Save corrected phrases
-        phrases_file = TRANSCRIPTS_DIR / f"{song['name']}_phrases.json"
-        with open(phrases_file, "w") as f:
-            json.dump(corrected_phrases, f, indent=2)
-        print(f"  → Updated {phrases_file.name}")
+    workers = min(args.workers, len(songs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_process_song_task, (song, si, len(songs),
+                                             args.min_confidence, args.dry_run),
+                        workers > 1): si
+            for si, song in enumerate(songs)
+        }
+        for future in as_completed(futures):
+            si = futures[future]
+            try:
+                clips, song_stats, log = future.result()
+            except Exception as e:  # the worker process itself died
+                print(f"  [ERROR] {songs[si]['artist']} — {songs[si]['title']}: {e}")
+                continue
+            print(log, end="")
+            if clips is None:
+                print(f"  [ERROR] {songs[si]['artist']} — {songs[si]['title']} failed (see above)")
+                continue
+            per_song_clips[si] = clips
+            for k, v in song_stats.items():
+                stats[k] += v
 
-        # Step 4: Re-chop audio clips
-        clips = rechop_song(
-            song["wav"], corrected_phrases,
-            song["artist"], song["title"], song["song_idx"],
-        )
-        all_clips.extend(clips)
-        print(f"  → Re-chopped {len(clips)} clips")
+    all_clips = list(chain.from_iterable(filter(None, per_song_clips)))
 
     # ── Summary ──
     print(f"\n{'=' * 60}")
@@ -0,0 +1,22 @@
+"""
+ytdl_common.py — Helpers shared by the yt-dlp download scripts
+(crawl_rap.py, download_videos.py).
+"""
+
+import threading
+
+# Serializes log lines from the download threads so they don't interleave
+_PRINT_LOCK = threading.Lock()
+
+
+def log(msg: str):
+    with _PRINT_LOCK:
+        print(msg, flush=True)
+
+
+class QuietLogger:
+    """Swallow yt-dlp's own output; failures surface as exceptions."""
+    def debug(self, msg): pass
+    def info(self, msg): pass
+    def warning(self, msg): pass
+    def error(self, msg): pass
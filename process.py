@@ -9,6 +9,7 @@
 
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 urls = [
     "https://www.youtube.com/watch?v=d3Ia0giTLhk",       # 1. Vine Boom
@@ -33,6 +34,8 @@ urls = [
 ]
 
 output_dir = "meme_sounds_wav"
+# Downloads are network-bound and independent, so run a few at once
+max_workers = 6
 os.makedirs(output_dir, exist_ok=True)
 
 
@@ -71,6 +74,7 @@ def download_wav(url: str, i: int) -> None:
         "--audio-quality", "0",
         "-o", safe_outtmpl(i),
         "--no-playlist",
+        "--no-progress",  # parallel progress bars would garble each other
         url,
     ]
 
@@ -86,13 +90,17 @@ def main():
     require_on_path("yt-dlp")
 
     errors = []
-    for i, url in enumerate(urls, 1):
-        try:
-            download_wav(url, i)
-            print(f"[{i:02d}] Saved to: {output_dir}")
-        except Exception as e:
-            print(f"Error with {url}: {e}")
-            errors.append((i, url, str(e)))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(download_wav, url, i): (i, url) for i, url in enumerate(urls, 1)}
+        for future in as_completed(futures):
+            i, url = futures[future]
+            try:
+                future.result()
+                print(f"[{i:02d}] Saved to: {output_dir}")
+            except Exception as e:
+                print(f"Error with {url}: {e}")
+                errors.append((i, url, str(e)))
+    errors.sort()
 
     print("\nAll downloads and conversions complete!")
     if errors: